@@ -4,17 +4,16 @@ Advanced CLI System for Rollback Agent
 Provides comprehensive user, session, and agent management.
 """
 
+import io
 import os
 import sys
-from pathlib import Path
-from typing import Optional, List, Tuple
+import time
+from typing import Any, Callable, Optional, List, Tuple, Dict
 from datetime import datetime
+from functools import cached_property
 import getpass
 from enum import Enum
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from src.auth.auth_service import AuthService
 from src.auth.user import User
 from src.sessions.external_session import ExternalSession
@@ -22,8 +21,81 @@ from src.sessions.internal_session import InternalSession
 from src.database.repositories.external_session_repository import ExternalSessionRepository
 from src.database.repositories.internal_session_repository import InternalSessionRepository
 from src.database.repositories.user_repository import UserRepository
+from src.database.repositories.checkpoint_repository import CheckpointRepository
 from src.agents.agent_service import AgentService
 from src.agents.rollback_agent import RollbackAgent
+from src.checkpoints.checkpoint import Checkpoint
+
+
+# Read once at import; checked before the CLI starts
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# How long (seconds) session listings are reused between menu redraws
+SESSION_CACHE_TTL = 2.0
+
+# How long (seconds) the admin statistics are reused
+STATS_CACHE_TTL = 5.0
+
+# Messages longer than this are shortened to PREVIEW_LEN characters plus PREVIEW_TAIL
+PREVIEW_LIMIT = 100
+PREVIEW_LEN = 97
+PREVIEW_TAIL = "..."
+
+# ANSI sequence: clear the screen and move the cursor to the top-left corner
+CLEAR_SEQUENCE = '\033[2J\033[H'
+
+
+def format_datetime(dt: Optional[datetime]) -> str:
+    """Format as 'YYYY-MM-DD HH:MM' without going through strftime."""
+    if dt is None:
+        return "Unknown"
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}"
+
+
+def format_date(dt: Optional[datetime]) -> str:
+    """Format as 'YYYY-MM-DD' without going through strftime."""
+    if dt is None:
+        return "Unknown"
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+
+
+def format_short_datetime(dt: Optional[datetime]) -> str:
+    """Format as 'MM-DD HH:MM' without going through strftime."""
+    if dt is None:
+        return "Unknown"
+    return f"{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}"
+
+
+def format_time(dt: Optional[datetime]) -> str:
+    """Format as 'HH:MM:SS' without going through strftime."""
+    if dt is None:
+        return "Unknown"
+    return f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+
+
+def enable_ansi_support() -> bool:
+    """Make sure the terminal understands ANSI escape sequences.
+    
+    On Windows this switches the console into virtual terminal mode.
+    
+    Returns:
+        True if ANSI sequences can be written directly, False otherwise.
+    """
+    if os.name != 'nt':
+        return True
+    
+    try:
+        import ctypes
+        
+        ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        return bool(kernel32.SetConsoleMode(handle, mode.value | ENABLE_VIRTUAL_TERMINAL_PROCESSING))
+    except (AttributeError, OSError):
+        return False
 
 
 class MenuChoice(Enum):
@@ -56,55 +128,352 @@ class Colors:
         cls.ENDC = ''
         cls.BOLD = ''
         cls.UNDERLINE = ''
+        cls.rebuild_prefixes()
+    
+    @classmethod
+    def should_disable(cls) -> bool:
+        """Check whether colors should be turned off for this process.
+        
+        Colors are dropped when stdout is not a terminal, when NO_COLOR is set
+        or when TERM is 'dumb'. FORCE_COLOR keeps them on regardless.
+        
+        Returns:
+            True if colors should be disabled.
+        """
+        if os.environ.get('FORCE_COLOR'):
+            return False
+        return (not sys.stdout.isatty()
+                or bool(os.environ.get('NO_COLOR'))
+                or os.environ.get('TERM') == 'dumb')
+    
+    @classmethod
+    def rebuild_prefixes(cls):
+        """Precompute the colored strings reused by every message and header."""
+        cls._BAR = f"{cls.HEADER}{'=' * 60}{cls.ENDC}"
+        cls._OK = f"{cls.GREEN}✓ "
+        cls._FAIL = f"{cls.FAIL}✗ "
+        cls._WARN = f"{cls.WARNING}⚠ "
+        cls._INFO = f"{cls.CYAN}ℹ "
+        cls._PROMPT = f"{cls.BLUE}▶ "
+        cls._ROLE_COLORS = {'assistant': cls.GREEN, 'user': cls.BLUE, 'system': cls.CYAN}
+
+
+Colors.rebuild_prefixes()
 
 
 class AdvancedCLI:
     """Advanced CLI for comprehensive system management."""
     
+    # Menu entries as (key, label, handler method name); "0" is handled by each menu
+    _AUTH_MENU = (
+        ("1", "Login", "login"),
+        ("2", "Register", "register"),
+    )
+    _MAIN_MENU = (
+        ("1", "Session Management", "session_management_menu"),
+        ("2", "User Profile", "user_profile_menu"),
+    )
+    _MAIN_MENU_ADMIN = (
+        ("3", "Admin Panel", "admin_menu"),
+    )
+    _SESSION_MENU = (
+        ("1", "Create New Session", "create_new_session"),
+        ("2", "List My Sessions", "list_sessions"),
+        ("3", "Resume Session", "resume_session"),
+        ("4", "Delete Session", "delete_session"),
+    )
+    _ADMIN_MENU = (
+        ("1", "List All Users", "list_all_users"),
+        ("2", "Delete User", "delete_user"),
+        ("3", "System Statistics", "show_statistics"),
+    )
+    
+    # Chat commands as command -> (handler method name, usage if an argument is required)
+    _CHAT_COMMANDS = {
+        "/clear": ("redraw_chat_header", None),
+        "/checkpoints": ("show_checkpoints", None),
+        "/checkpoint": ("create_checkpoint", "Usage: /checkpoint <name>"),
+        "/rollback": ("rollback_to_checkpoint", "Usage: /rollback <id/name>"),
+        "/history": ("show_history", None),
+    }
+    
     def __init__(self):
         """Initialize the CLI system."""
+        if Colors.should_disable():
+            Colors.disable()
+        
         self.auth_service = AuthService()
         self.external_session_repo = ExternalSessionRepository()
         self.internal_session_repo = InternalSessionRepository()
+        self.checkpoint_repo = CheckpointRepository()
         self.user_repo = UserRepository()
-        self.agent_service = None  # Initialized after login
         self.current_user: Optional[User] = None
+        self._is_admin = False  # Snapshot of current_user.is_admin taken at login
         self.current_external_session: Optional[ExternalSession] = None
         self.current_agent: Optional[RollbackAgent] = None
+        
+        # Short-lived caches for session listings, keyed by user / external session ID
+        self._sessions_cache: Dict[int, Tuple[float, List[ExternalSession]]] = {}
+        self._internal_sessions_cache: Dict[int, Tuple[float, List[InternalSession]]] = {}
+        
+        # System statistics for the admin panel: (timestamp, counts)
+        self._stats_cache: Optional[Tuple[float, Dict[str, int]]] = None
+        
+        # Number of sessions of the current user; None until first needed
+        self._session_count: Optional[int] = None
+        
+        # Display-ready conversation history: (agent, history_version, entries)
+        self._history_cache: Optional[Tuple[RollbackAgent, int, List[Tuple[str, str, str, str]]]] = None
+        
+        # Checkpoints of the current internal session: (key, checkpoints, by_id, lowercase names)
+        self._checkpoint_index: Optional[Tuple[tuple, List[Checkpoint], Dict[int, Checkpoint],
+                                               List[Tuple[str, Checkpoint]]]] = None
+        
+        # Clear the screen with an escape sequence rather than spawning a shell
+        self._clear_seq = CLEAR_SEQUENCE if enable_ansi_support() else None
+        
+        # Scripted runs read stdin directly and skip "press Enter" pauses
+        self._interactive = sys.stdin.isatty()
+        
+        # Output is collected here and written in one go before each prompt
+        self._out = io.StringIO()
+    
+    @cached_property
+    def agent_service(self) -> AgentService:
+        """Agent service, created on first use rather than at login."""
+        return AgentService()
+    
+    def _get_user_sessions_cached(self, user_id: int,
+                                  ttl: float = SESSION_CACHE_TTL) -> List[ExternalSession]:
+        """Get a user's external sessions, reusing a recent result if available.
+        
+        Args:
+            user_id: The ID of the user.
+            ttl: Maximum age in seconds of a cached result.
+        
+        Returns:
+            List of the user's ExternalSession objects.
+        """
+        now = time.monotonic()
+        cached = self._sessions_cache.get(user_id)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        
+        sessions = self.external_session_repo.get_user_sessions(user_id)
+        self._sessions_cache[user_id] = (now, sessions)
+        return sessions
+    
+    def _get_session_count(self) -> int:
+        """Get the current user's session count, querying only when unknown.
+        
+        Returns:
+            Number of external sessions owned by the current user.
+        """
+        if self._session_count is None:
+            self._session_count = self.external_session_repo.count_user_sessions(self.current_user.id)
+        return self._session_count
+    
+    def _get_internal_sessions_cached(self, external_session_id: int,
+                                      ttl: float = SESSION_CACHE_TTL) -> List[InternalSession]:
+        """Get the internal sessions of an external session, reusing a recent result.
+        
+        Args:
+            external_session_id: The ID of the external session.
+            ttl: Maximum age in seconds of a cached result.
+        
+        Returns:
+            List of InternalSession objects.
+        """
+        now = time.monotonic()
+        cached = self._internal_sessions_cache.get(external_session_id)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        
+        sessions = self.internal_session_repo.get_by_external_session_with_counts(external_session_id)
+        self._internal_sessions_cache[external_session_id] = (now, sessions)
+        return sessions
+    
+    def _get_internal_sessions_for(self, external_sessions: List[ExternalSession],
+                                   ttl: float = SESSION_CACHE_TTL) -> Dict[int, List[InternalSession]]:
+        """Get the internal sessions of several external sessions at once.
+        
+        Fresh cache entries are reused; all misses are loaded with a single query.
+        
+        Args:
+            external_sessions: The external sessions to look up.
+            ttl: Maximum age in seconds of a cached result.
+        
+        Returns:
+            Dictionary mapping external session ID to its InternalSession objects.
+        """
+        now = time.monotonic()
+        result: Dict[int, List[InternalSession]] = {}
+        missing: List[int] = []
+        
+        for ext_session in external_sessions:
+            cached = self._internal_sessions_cache.get(ext_session.id)
+            if cached and now - cached[0] < ttl:
+                result[ext_session.id] = cached[1]
+            else:
+                missing.append(ext_session.id)
+        
+        if missing:
+            fetched = self.internal_session_repo.get_by_external_session_ids(missing, with_counts=True)
+            for external_session_id, sessions in fetched.items():
+                self._internal_sessions_cache[external_session_id] = (now, sessions)
+                result[external_session_id] = sessions
+        
+        return result
+    
+    def _display_history(self) -> List[Tuple[str, str, str, str]]:
+        """Get the current agent's conversation history prepared for display.
+        
+        The entries are rebuilt only when the agent or its history_version changes.
+        
+        Returns:
+            List of (role label, role color, preview, full content) tuples.
+        """
+        agent = self.current_agent
+        version = getattr(agent, 'history_version', None)
+        if (self._history_cache and self._history_cache[0] is agent
+                and self._history_cache[1] == version):
+            return self._history_cache[2]
+        
+        entries = []
+        for msg in agent.get_conversation_history():
+            role = msg.get('role', 'unknown')
+            content = msg.get('content', '')
+            preview = content[:PREVIEW_LEN] + PREVIEW_TAIL if len(content) > PREVIEW_LIMIT else content
+            role_color = Colors._ROLE_COLORS.get(role, Colors.BLUE)
+            entries.append((role.upper(), role_color, preview, content))
+        
+        self._history_cache = (agent, version, entries)
+        return entries
+    
+    def _emit(self, text: Any = "", end: str = "\n"):
+        """Queue text for output; it is written on the next flush."""
+        self._out.write(f"{text}{end}")
+    
+    def _flush_output(self):
+        """Write all queued output to stdout with a single write and flush."""
+        pending = self._out.getvalue()
+        if pending:
+            sys.stdout.write(pending)
+            self._out.seek(0)
+            self._out.truncate(0)
+        sys.stdout.flush()
+    
+    def _read_line(self, prompt: str) -> str:
+        """Flush pending output, show the prompt and read one line.
+        
+        Scripted (non-TTY) input is read straight from stdin, skipping input()'s
+        readline handling.
+        
+        Raises:
+            EOFError: If stdin is exhausted.
+        """
+        if self._interactive:
+            self._flush_output()
+            return input(prompt)
+        
+        self._emit(prompt, end="")
+        self._flush_output()
+        line = sys.stdin.readline()
+        if not line:
+            raise EOFError
+        return line.rstrip('\n')
+    
+    def _prompt_password(self, prompt: str) -> str:
+        """Flush pending output and read a password without echo."""
+        self._flush_output()
+        return getpass.getpass(prompt)
     
     def clear_screen(self):
         """Clear the terminal screen."""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if self._clear_seq is None:
+            self._flush_output()
+            os.system('cls')
+            return
+        # Anything still queued would be wiped by the clear anyway
+        self._out.seek(0)
+        self._out.truncate(0)
+        self._emit(self._clear_seq, end="")
     
     def print_header(self, title: str):
         """Print a formatted header."""
-        print(f"\n{Colors.HEADER}{'='*60}{Colors.ENDC}")
-        print(f"{Colors.HEADER}{Colors.BOLD}{title.center(60)}{Colors.ENDC}")
-        print(f"{Colors.HEADER}{'='*60}{Colors.ENDC}\n")
+        self._emit(
+            f"\n{Colors._BAR}\n"
+            f"{Colors.HEADER}{Colors.BOLD}{title.center(60)}{Colors.ENDC}\n"
+            f"{Colors._BAR}\n"
+        )
     
     def print_success(self, message: str):
         """Print a success message."""
-        print(f"{Colors.GREEN}✓ {message}{Colors.ENDC}")
+        self._emit(Colors._OK + message + Colors.ENDC)
     
     def print_error(self, message: str):
         """Print an error message."""
-        print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+        self._emit(Colors._FAIL + message + Colors.ENDC)
     
     def print_warning(self, message: str):
         """Print a warning message."""
-        print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+        self._emit(Colors._WARN + message + Colors.ENDC)
     
     def print_info(self, message: str):
         """Print an info message."""
-        print(f"{Colors.CYAN}ℹ {message}{Colors.ENDC}")
+        self._emit(Colors._INFO + message + Colors.ENDC)
     
     def get_choice(self, prompt: str) -> str:
         """Get user choice with colored prompt."""
-        return input(f"{Colors.BLUE}▶ {prompt}: {Colors.ENDC}").strip()
+        return self._read_line(Colors._PROMPT + prompt + ": " + Colors.ENDC).strip()
+    
+    def _pick_index(self, choice: str, n: int) -> Optional[int]:
+        """Convert a 1-based menu choice into a list index.
+        
+        Args:
+            choice: The text entered by the user.
+            n: Number of selectable items.
+            
+        Returns:
+            The 0-based index, or None if the choice is not a number in 1..n.
+        """
+        if choice.isdigit() and 1 <= int(choice) <= n:
+            return int(choice) - 1
+        return None
     
     def pause(self):
         """Pause for user input."""
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.ENDC}")
+        if not self._interactive:
+            # Nobody to wait for when input is scripted
+            self._flush_output()
+            return
+        self._read_line(f"\n{Colors.CYAN}Press Enter to continue...{Colors.ENDC}")
+    
+    def render_menu(self, items: Tuple[Tuple[str, str, str], ...], back_label: str):
+        """Print menu entries followed by the "0" entry.
+        
+        Args:
+            items: Menu entries as (key, label, handler method name).
+            back_label: Label of the "0" entry.
+        """
+        lines = [f"{key}. {label}" for key, label, _ in items]
+        lines.append(f"0. {back_label}\n")
+        self._emit("\n".join(lines))
+    
+    def get_menu_handler(self, items: Tuple[Tuple[str, str, str], ...],
+                         choice: str) -> Optional[Callable[[], Any]]:
+        """Look up the handler for a menu choice.
+        
+        Args:
+            items: Menu entries as (key, label, handler method name).
+            choice: The key entered by the user.
+            
+        Returns:
+            The bound handler method, or None if the choice is not in the menu.
+        """
+        handlers = {key: method for key, _, method in items}
+        method = handlers.get(choice)
+        return getattr(self, method) if method else None
     
     # ========== Authentication ==========
     
@@ -118,18 +487,13 @@ class AdvancedCLI:
             self.clear_screen()
             self.print_header("ROLLBACK AGENT SYSTEM")
             
-            print("1. Login")
-            print("2. Register")
-            print("0. Exit")
-            print()
+            self.render_menu(self._AUTH_MENU, "Exit")
             
             choice = self.get_choice("Enter choice")
+            handler = self.get_menu_handler(self._AUTH_MENU, choice)
             
-            if choice == "1":
-                if self.login():
-                    return True
-            elif choice == "2":
-                if self.register():
+            if handler:
+                if handler():
                     return True
             elif choice == "0":
                 return False
@@ -147,13 +511,13 @@ class AdvancedCLI:
         self.print_header("LOGIN")
         
         username = self.get_choice("Username")
-        password = getpass.getpass(f"{Colors.BLUE}▶ Password: {Colors.ENDC}")
+        password = self._prompt_password(Colors._PROMPT + "Password: " + Colors.ENDC)
         
         success, user, message = self.auth_service.login(username, password)
         
         if success and user:
             self.current_user = user
-            self.agent_service = AgentService()
+            self._is_admin = bool(user.is_admin)
             self.print_success(f"Welcome back, {user.username}!")
             self.pause()
             return True
@@ -172,8 +536,8 @@ class AdvancedCLI:
         self.print_header("REGISTER")
         
         username = self.get_choice("Choose username")
-        password = getpass.getpass(f"{Colors.BLUE}▶ Choose password: {Colors.ENDC}")
-        confirm = getpass.getpass(f"{Colors.BLUE}▶ Confirm password: {Colors.ENDC}")
+        password = self._prompt_password(Colors._PROMPT + "Choose password: " + Colors.ENDC)
+        confirm = self._prompt_password(Colors._PROMPT + "Confirm password: " + Colors.ENDC)
         
         if password != confirm:
             self.print_error("Passwords don't match")
@@ -184,7 +548,7 @@ class AdvancedCLI:
         
         if success and user:
             self.current_user = user
-            self.agent_service = AgentService()
+            self._is_admin = bool(user.is_admin)
             self.print_success(f"Registration successful! Welcome, {user.username}!")
             self.pause()
             return True
@@ -200,28 +564,27 @@ class AdvancedCLI:
         while True:
             self.clear_screen()
             self.print_header("MAIN MENU")
-            print(f"Logged in as: {Colors.BOLD}{self.current_user.username}{Colors.ENDC}")
-            if self.current_user.is_admin:
-                print(f"Role: {Colors.WARNING}Administrator{Colors.ENDC}")
-            print()
+            self._emit(f"Logged in as: {Colors.BOLD}{self.current_user.username}{Colors.ENDC}")
+            if self._is_admin:
+                self._emit(f"Role: {Colors.WARNING}Administrator{Colors.ENDC}")
+            self._emit()
             
-            print("1. Session Management")
-            print("2. User Profile")
-            if self.current_user.is_admin:
-                print("3. Admin Panel")
-            print("0. Logout")
-            print()
+            items = self._MAIN_MENU
+            if self._is_admin:
+                items += self._MAIN_MENU_ADMIN
+            self.render_menu(items, "Logout")
             
             choice = self.get_choice("Enter choice")
+            handler = self.get_menu_handler(items, choice)
             
-            if choice == "1":
-                self.session_management_menu()
-            elif choice == "2":
-                self.user_profile_menu()
-            elif choice == "3" and self.current_user.is_admin:
-                self.admin_menu()
+            if handler:
+                handler()
             elif choice == "0":
                 self.print_info("Logging out...")
+                # Release the agent service; it is rebuilt on next use
+                self.__dict__.pop('agent_service', None)
+                self._session_count = None
+                self._is_admin = False
                 break
             else:
                 self.print_error("Invalid choice")
@@ -235,28 +598,15 @@ class AdvancedCLI:
             self.clear_screen()
             self.print_header("SESSION MANAGEMENT")
             
-            # Get user's external sessions
-            external_sessions = self.external_session_repo.get_user_sessions(self.current_user.id)
+            self._emit(f"You have {Colors.BOLD}{self._get_session_count()}{Colors.ENDC} session(s)\n")
             
-            print(f"You have {Colors.BOLD}{len(external_sessions)}{Colors.ENDC} session(s)\n")
-            
-            print("1. Create New Session")
-            print("2. List My Sessions")
-            print("3. Resume Session")
-            print("4. Delete Session")
-            print("0. Back to Main Menu")
-            print()
+            self.render_menu(self._SESSION_MENU, "Back to Main Menu")
             
             choice = self.get_choice("Enter choice")
+            handler = self.get_menu_handler(self._SESSION_MENU, choice)
             
-            if choice == "1":
-                self.create_new_session()
-            elif choice == "2":
-                self.list_sessions()
-            elif choice == "3":
-                self.resume_session()
-            elif choice == "4":
-                self.delete_session()
+            if handler:
+                handler()
             elif choice == "0":
                 break
             else:
@@ -270,7 +620,7 @@ class AdvancedCLI:
         
         session_name = self.get_choice("Session name (or press Enter for default)")
         if not session_name:
-            session_name = f"Session {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            session_name = f"Session {format_datetime(datetime.now())}"
         
         external_session = ExternalSession(
             user_id=self.current_user.id,
@@ -280,6 +630,10 @@ class AdvancedCLI:
         external_session = self.external_session_repo.create(external_session)
         
         if external_session:
+            self._sessions_cache.pop(self.current_user.id, None)
+            self._stats_cache = None
+            if self._session_count is not None:
+                self._session_count += 1
             self.print_success(f"Created session: {session_name}")
             
             # Ask if user wants to start chatting immediately
@@ -296,32 +650,33 @@ class AdvancedCLI:
         self.clear_screen()
         self.print_header("MY SESSIONS")
         
-        external_sessions = self.external_session_repo.get_user_sessions(self.current_user.id)
+        external_sessions = self._get_user_sessions_cached(self.current_user.id)
         
         if not external_sessions:
             self.print_info("No sessions found")
         else:
+            internal_by_external = self._get_internal_sessions_for(external_sessions)
+            
             for ext_session in external_sessions:
                 # Display external session
-                created = ext_session.created_at.strftime('%Y-%m-%d %H:%M') if ext_session.created_at else "Unknown"
-                print(f"\n{Colors.BOLD}📁 {ext_session.session_name}{Colors.ENDC}")
-                print(f"   ID: {ext_session.id} | Created: {created}")
+                created = format_datetime(ext_session.created_at)
+                self._emit(f"\n{Colors.BOLD}📁 {ext_session.session_name}{Colors.ENDC}")
+                self._emit(f"   ID: {ext_session.id} | Created: {created}")
                 
-                # Get internal sessions for this external session
-                internal_sessions = self.internal_session_repo.get_by_external_session(ext_session.id)
+                internal_sessions = internal_by_external[ext_session.id]
                 
                 if internal_sessions:
-                    print(f"   {Colors.CYAN}Internal Sessions:{Colors.ENDC}")
+                    self._emit(f"   {Colors.CYAN}Internal Sessions:{Colors.ENDC}")
                     for int_session in internal_sessions:
                         status = "✓ Current" if int_session.is_current else "  "
-                        created = int_session.created_at.strftime('%m-%d %H:%M') if int_session.created_at else "Unknown"
+                        created = format_short_datetime(int_session.created_at)
                         checkpoint_count = int_session.checkpoint_count or 0
                         
-                        print(f"     {status} ID: {int_session.id} | "
+                        self._emit(f"     {status} ID: {int_session.id} | "
                               f"Created: {created} | "
                               f"Checkpoints: {checkpoint_count}")
                 else:
-                    print(f"   {Colors.WARNING}No internal sessions{Colors.ENDC}")
+                    self._emit(f"   {Colors.WARNING}No internal sessions{Colors.ENDC}")
         
         self.pause()
     
@@ -330,7 +685,7 @@ class AdvancedCLI:
         self.clear_screen()
         self.print_header("RESUME SESSION")
         
-        external_sessions = self.external_session_repo.get_user_sessions(self.current_user.id)
+        external_sessions = self._get_user_sessions_cached(self.current_user.id)
         
         if not external_sessions:
             self.print_info("No sessions to resume")
@@ -338,12 +693,12 @@ class AdvancedCLI:
             return
         
         # Display sessions to choose from
-        print("Available sessions:\n")
+        self._emit("Available sessions:\n")
         for i, ext_session in enumerate(external_sessions, 1):
-            created = ext_session.created_at.strftime('%Y-%m-%d %H:%M') if ext_session.created_at else "Unknown"
-            print(f"{i}. {ext_session.session_name} (Created: {created})")
+            created = format_datetime(ext_session.created_at)
+            self._emit(f"{i}. {ext_session.session_name} (Created: {created})")
         
-        print("\n0. Cancel")
+        self._emit("\n0. Cancel")
         
         # Get external session choice
         choice = self.get_choice("Select session")
@@ -351,24 +706,21 @@ class AdvancedCLI:
         if choice == "0":
             return
         
-        try:
-            idx = int(choice) - 1
-            if 0 <= idx < len(external_sessions):
-                self.current_external_session = external_sessions[idx]
-                self.select_internal_session()
-            else:
-                self.print_error("Invalid selection")
-                self.pause()
-        except ValueError:
-            self.print_error("Invalid input")
+        idx = self._pick_index(choice, len(external_sessions))
+        if idx is None:
+            self.print_error("Invalid selection")
             self.pause()
+            return
+        
+        self.current_external_session = external_sessions[idx]
+        self.select_internal_session()
     
     def select_internal_session(self):
         """Select which internal session to resume or create new."""
         self.clear_screen()
         self.print_header(f"SESSION: {self.current_external_session.session_name}")
         
-        internal_sessions = self.internal_session_repo.get_by_external_session(
+        internal_sessions = self._get_internal_sessions_cached(
             self.current_external_session.id
         )
         
@@ -377,15 +729,15 @@ class AdvancedCLI:
             self.start_new_internal_session()
             return
         
-        print("Internal sessions:\n")
+        self._emit("Internal sessions:\n")
         for i, int_session in enumerate(internal_sessions, 1):
             status = "✓" if int_session.is_current else " "
-            created = int_session.created_at.strftime('%Y-%m-%d %H:%M') if int_session.created_at else "Unknown"
-            print(f"{i}. [{status}] Session {int_session.id} (Created: {created}, "
+            created = format_datetime(int_session.created_at)
+            self._emit(f"{i}. [{status}] Session {int_session.id} (Created: {created}, "
                   f"Checkpoints: {int_session.checkpoint_count})")
         
-        print(f"\n{len(internal_sessions) + 1}. Create new internal session")
-        print("0. Cancel")
+        self._emit(f"\n{len(internal_sessions) + 1}. Create new internal session")
+        self._emit("0. Cancel")
         
         choice = self.get_choice("Select internal session")
         
@@ -394,23 +746,20 @@ class AdvancedCLI:
         elif choice == str(len(internal_sessions) + 1):
             self.start_new_internal_session()
         else:
-            try:
-                idx = int(choice) - 1
-                if 0 <= idx < len(internal_sessions):
-                    selected_session = internal_sessions[idx]
-                    self.resume_internal_session(selected_session)
-                else:
-                    self.print_error("Invalid selection")
-                    self.pause()
-            except ValueError:
-                self.print_error("Invalid input")
+            idx = self._pick_index(choice, len(internal_sessions))
+            if idx is None:
+                self.print_error("Invalid selection")
                 self.pause()
+                return
+            
+            self.resume_internal_session(internal_sessions[idx])
     
     def start_new_internal_session(self):
         """Start a new internal session within current external session."""
         self.print_info("Creating new agent session...")
         
         # Create new agent
+        self._flush_output()
         self.current_agent = self.agent_service.create_new_agent(
             external_session_id=self.current_external_session.id
         )
@@ -427,6 +776,7 @@ class AdvancedCLI:
         self.print_info(f"Resuming session {internal_session.id}...")
         
         # Resume the agent
+        self._flush_output()
         self.current_agent = self.agent_service.resume_agent(
             external_session_id=self.current_external_session.id,
             internal_session_id=internal_session.id
@@ -436,17 +786,11 @@ class AdvancedCLI:
             self.print_success("Session resumed successfully!")
             
             # Show recent conversation history
-            history = self.current_agent.get_conversation_history()
+            history = self._display_history()
             if history:
-                print(f"\n{Colors.CYAN}Recent conversation:{Colors.ENDC}")
-                for msg in history[-4:]:  # Show last 2 exchanges
-                    role = msg.get('role', 'unknown')
-                    content = msg.get('content', '')
-                    if len(content) > 100:
-                        content = content[:97] + "..."
-                    
-                    role_color = Colors.GREEN if role == 'assistant' else Colors.BLUE
-                    print(f"{role_color}[{role.upper()}]{Colors.ENDC} {content}")
+                self._emit(f"\n{Colors.CYAN}Recent conversation:{Colors.ENDC}")
+                for role, role_color, preview, _ in history[-4:]:  # Show last 2 exchanges
+                    self._emit(f"{role_color}[{role}]{Colors.ENDC} {preview}")
             
             self.chat_interface()
         else:
@@ -458,7 +802,7 @@ class AdvancedCLI:
         self.clear_screen()
         self.print_header("DELETE SESSION")
         
-        external_sessions = self.external_session_repo.get_user_sessions(self.current_user.id)
+        external_sessions = self._get_user_sessions_cached(self.current_user.id)
         
         if not external_sessions:
             self.print_info("No sessions to delete")
@@ -466,40 +810,44 @@ class AdvancedCLI:
             return
         
         # Display sessions
-        print("Sessions:\n")
+        self._emit("Sessions:\n")
         for i, ext_session in enumerate(external_sessions, 1):
-            print(f"{i}. {ext_session.session_name}")
+            self._emit(f"{i}. {ext_session.session_name}")
         
-        print("\n0. Cancel")
+        self._emit("\n0. Cancel")
         
         choice = self.get_choice("Select session to delete")
         
         if choice == "0":
             return
         
-        try:
-            idx = int(choice) - 1
-            if 0 <= idx < len(external_sessions):
-                session_to_delete = external_sessions[idx]
-                
-                # Confirm deletion
-                confirm = self.get_choice(
-                    f"Delete '{session_to_delete.session_name}'? "
-                    f"This will delete all internal sessions and checkpoints! (y/n)"
-                )
-                
-                if confirm.lower() == 'y':
-                    success = self.external_session_repo.delete(session_to_delete.id)
-                    if success:
-                        self.print_success("Session deleted successfully")
-                    else:
-                        self.print_error("Failed to delete session")
-                else:
-                    self.print_info("Deletion cancelled")
+        idx = self._pick_index(choice, len(external_sessions))
+        if idx is None:
+            self.print_error("Invalid selection")
+            self.pause()
+            return
+        
+        session_to_delete = external_sessions[idx]
+        
+        # Confirm deletion
+        confirm = self.get_choice(
+            f"Delete '{session_to_delete.session_name}'? "
+            f"This will delete all internal sessions and checkpoints! (y/n)"
+        )
+        
+        if confirm.lower() == 'y':
+            success = self.external_session_repo.delete(session_to_delete.id)
+            if success:
+                self._sessions_cache.pop(self.current_user.id, None)
+                self._internal_sessions_cache.pop(session_to_delete.id, None)
+                self._stats_cache = None
+                if self._session_count is not None:
+                    self._session_count -= 1
+                self.print_success("Session deleted successfully")
             else:
-                self.print_error("Invalid selection")
-        except ValueError:
-            self.print_error("Invalid input")
+                self.print_error("Failed to delete session")
+        else:
+            self.print_info("Deletion cancelled")
         
         self.pause()
     
@@ -510,20 +858,22 @@ class AdvancedCLI:
         self.clear_screen()
         self.print_header(f"CHAT: {self.current_external_session.session_name}")
         
-        print(f"{Colors.CYAN}Commands:{Colors.ENDC}")
-        print("  /checkpoints - List checkpoints")
-        print("  /checkpoint <name> - Create checkpoint")
-        print("  /rollback <id/name> - Rollback to checkpoint")
-        print("  /history - Show conversation history")
-        print("  /clear - Clear screen")
-        print("  /exit - Exit chat")
-        print()
-        print(f"{Colors.WARNING}Type your message or command:{Colors.ENDC}\n")
+        self._emit("\n".join([
+            f"{Colors.CYAN}Commands:{Colors.ENDC}",
+            "  /checkpoints - List checkpoints",
+            "  /checkpoint <name> - Create checkpoint",
+            "  /rollback <id/name> - Rollback to checkpoint",
+            "  /history - Show conversation history",
+            "  /clear - Clear screen",
+            "  /exit - Exit chat",
+            "",
+            f"{Colors.WARNING}Type your message or command:{Colors.ENDC}\n",
+        ]))
         
         while True:
             try:
                 # Get user input
-                user_input = input(f"{Colors.BLUE}You: {Colors.ENDC}")
+                user_input = self._read_line(f"{Colors.BLUE}You: {Colors.ENDC}")
                 
                 if not user_input:
                     continue
@@ -535,39 +885,54 @@ class AdvancedCLI:
                     continue
                 
                 # Send to agent
-                print(f"{Colors.GREEN}Agent: {Colors.ENDC}", end="", flush=True)
-                response = self.current_agent.run(user_input)
+                self._emit(f"{Colors.GREEN}Agent: {Colors.ENDC}", end="")
+                self._flush_output()
                 
-                # Display response
-                if hasattr(response, 'content'):
-                    print(response.content)
+                # Stream the response as it is generated when the agent supports it
+                if hasattr(self.current_agent, 'run_stream'):
+                    for chunk in self.current_agent.run_stream(user_input):
+                        sys.stdout.write(chunk)
+                        sys.stdout.flush()
+                    self._emit()
+                    response = self.current_agent.run_response
                 else:
-                    print(response)
+                    response = self.current_agent.run(user_input)
+                    
+                    # Display response
+                    if hasattr(response, 'content'):
+                        self._emit(response.content)
+                    else:
+                        self._emit(response)
                 
                 # Check for rollback request
                 if self.agent_service.handle_agent_response(self.current_agent, response):
                     checkpoint_id = self.current_agent.session_state.get('rollback_checkpoint_id')
                     if checkpoint_id:
-                        print(f"\n{Colors.WARNING}Performing rollback...{Colors.ENDC}")
+                        self._emit(f"\n{Colors.WARNING}Performing rollback...{Colors.ENDC}")
+                        self._flush_output()
                         new_agent = self.agent_service.rollback_to_checkpoint(
                             self.current_external_session.id,
                             checkpoint_id
                         )
                         if new_agent:
                             self.current_agent = new_agent
+                            self._checkpoint_index = None
                             self.print_success("Rollback completed!")
                         else:
                             self.print_error("Rollback failed")
                 
-                print()  # Empty line for readability
+                self._emit()  # Empty line for readability
                 
             except KeyboardInterrupt:
-                print("\n")
+                self._emit("\n")
                 if self.get_choice("Exit chat? (y/n)").lower() == 'y':
                     break
             except Exception as e:
                 self.print_error(f"Error: {e}")
-    
+
+        # Chatting may have created internal sessions or checkpoints
+        self._internal_sessions_cache.pop(self.current_external_session.id, None)
+
     def handle_chat_command(self, command: str) -> bool:
         """Handle chat commands.
         
@@ -583,72 +948,88 @@ class AdvancedCLI:
         
         if cmd == "/exit":
             return False
-        elif cmd == "/clear":
-            self.clear_screen()
-            self.print_header(f"CHAT: {self.current_external_session.session_name}")
-        elif cmd == "/checkpoints":
-            self.show_checkpoints()
-        elif cmd == "/checkpoint":
-            if arg:
-                self.create_checkpoint(arg)
-            else:
-                self.print_error("Usage: /checkpoint <name>")
-        elif cmd == "/rollback":
-            if arg:
-                self.rollback_to_checkpoint(arg)
-            else:
-                self.print_error("Usage: /rollback <id/name>")
-        elif cmd == "/history":
-            self.show_history()
-        else:
+        
+        if cmd not in self._CHAT_COMMANDS:
             self.print_error(f"Unknown command: {cmd}")
+            return True
+        
+        method, usage = self._CHAT_COMMANDS[cmd]
+        if usage is None:
+            getattr(self, method)()
+        elif arg:
+            getattr(self, method)(arg)
+        else:
+            self.print_error(usage)
         
         return True
     
-    def show_checkpoints(self):
-        """Show available checkpoints."""
-        checkpoints = self.current_agent.checkpoint_repo.get_by_internal_session(
-            self.current_agent.internal_session.id,
+    def redraw_chat_header(self):
+        """Clear the screen and show the chat header again."""
+        self.clear_screen()
+        self.print_header(f"CHAT: {self.current_external_session.session_name}")
+    
+    def _get_checkpoint_index(self) -> Tuple[List[Checkpoint], Dict[int, Checkpoint],
+                                             List[Tuple[str, Checkpoint]]]:
+        """Get the current session's checkpoints with lookup tables.
+        
+        The checkpoints are fetched again only when the agent, its history or
+        its checkpoint count has changed since the last call.
+        
+        Returns:
+            Tuple of (checkpoints, checkpoints by ID, (lowercase name, checkpoint) pairs).
+        """
+        agent = self.current_agent
+        key = (id(agent), agent.internal_session.id,
+               getattr(agent, 'history_version', None), agent.internal_session.checkpoint_count)
+        if self._checkpoint_index and self._checkpoint_index[0] == key:
+            return self._checkpoint_index[1:]
+        
+        checkpoints = agent.checkpoint_repo.get_by_internal_session(
+            agent.internal_session.id,
             auto_only=False
         )
+        by_id = {cp.id: cp for cp in checkpoints}
+        by_name = [(cp.checkpoint_name.lower(), cp) for cp in checkpoints if cp.checkpoint_name]
+        
+        self._checkpoint_index = (key, checkpoints, by_id, by_name)
+        return checkpoints, by_id, by_name
+    
+    def show_checkpoints(self):
+        """Show available checkpoints."""
+        checkpoints, _, _ = self._get_checkpoint_index()
         
         if not checkpoints:
             self.print_info("No checkpoints found")
         else:
-            print(f"\n{Colors.CYAN}Checkpoints:{Colors.ENDC}")
+            lines = [f"\n{Colors.CYAN}Checkpoints:{Colors.ENDC}"]
             for cp in checkpoints:
                 cp_type = "AUTO" if cp.is_auto else "MANUAL"
-                created = cp.created_at.strftime('%H:%M:%S') if cp.created_at else "Unknown"
+                created = format_time(cp.created_at)
                 name = cp.checkpoint_name or "Unnamed"
-                print(f"  [{cp_type}] ID: {cp.id} | {name} | Created: {created}")
-        print()
+                lines.append(f"  [{cp_type}] ID: {cp.id} | {name} | Created: {created}")
+            self._emit("\n".join(lines))
+        self._emit()
     
     def create_checkpoint(self, name: str):
         """Create a manual checkpoint."""
         result = self.current_agent.create_checkpoint(name)
+        self._checkpoint_index = None
         self.print_success(result)
     
     def rollback_to_checkpoint(self, target: str):
         """Rollback to a checkpoint."""
         # First, try to find the checkpoint by ID or name
-        checkpoints = self.current_agent.checkpoint_repo.get_by_internal_session(
-            self.current_agent.internal_session.id,
-            auto_only=False
-        )
+        _, by_id, by_name = self._get_checkpoint_index()
         
         checkpoint = None
         # Try to parse as ID first
-        try:
-            checkpoint_id = int(target)
-            for cp in checkpoints:
-                if cp.id == checkpoint_id:
-                    checkpoint = cp
-                    break
-        except ValueError:
+        if target.isdigit():
+            checkpoint = by_id.get(int(target))
+        else:
             # Not an ID, try to find by name
             target_lower = target.lower()
-            for cp in checkpoints:
-                if cp.checkpoint_name and target_lower in cp.checkpoint_name.lower():
+            for name, cp in by_name:
+                if target_lower in name:
                     checkpoint = cp
                     break
         
@@ -657,7 +1038,8 @@ class AdvancedCLI:
             return
         
         # Perform the rollback directly
-        print(f"\n{Colors.WARNING}Rolling back to checkpoint {checkpoint.id} ({checkpoint.checkpoint_name})...{Colors.ENDC}")
+        self._emit(f"\n{Colors.WARNING}Rolling back to checkpoint {checkpoint.id} ({checkpoint.checkpoint_name})...{Colors.ENDC}")
+        self._flush_output()
         
         new_agent = self.agent_service.rollback_to_checkpoint(
             self.current_external_session.id,
@@ -666,38 +1048,30 @@ class AdvancedCLI:
         
         if new_agent:
             self.current_agent = new_agent
+            self._checkpoint_index = None
             self.print_success("Rollback completed successfully!")
             # Show the restored conversation context
-            history = new_agent.get_conversation_history()
-            if history and len(history) > 0:
-                print(f"\n{Colors.CYAN}Restored to this point in conversation:{Colors.ENDC}")
+            history = self._display_history()
+            if history:
+                self._emit(f"\n{Colors.CYAN}Restored to this point in conversation:{Colors.ENDC}")
                 # Show last exchange
-                for msg in history[-2:]:
-                    role = msg.get('role', 'unknown')
-                    content = msg.get('content', '')
-                    if len(content) > 100:
-                        content = content[:97] + "..."
-                    role_color = Colors.GREEN if role == 'assistant' else Colors.BLUE
-                    print(f"{role_color}[{role.upper()}]{Colors.ENDC} {content}")
+                for role, role_color, preview, _ in history[-2:]:
+                    self._emit(f"{role_color}[{role}]{Colors.ENDC} {preview}")
         else:
             self.print_error("Rollback failed")
     
     def show_history(self):
         """Show conversation history."""
-        history = self.current_agent.get_conversation_history()
+        history = self._display_history()
         
         if not history:
             self.print_info("No conversation history")
         else:
-            print(f"\n{Colors.CYAN}Conversation History:{Colors.ENDC}")
-            for msg in history:
-                role = msg.get('role', 'unknown')
-                content = msg.get('content', '')
-                
-                role_color = Colors.GREEN if role == 'assistant' else Colors.BLUE
-                print(f"\n{role_color}[{role.upper()}]{Colors.ENDC}")
-                print(content)
-        print()
+            self._emit(f"\n{Colors.CYAN}Conversation History:{Colors.ENDC}")
+            for role, role_color, _, content in history:
+                self._emit(f"\n{role_color}[{role}]{Colors.ENDC}")
+                self._emit(content)
+        self._emit()
     
     # ========== User Profile ==========
     
@@ -706,18 +1080,17 @@ class AdvancedCLI:
         self.clear_screen()
         self.print_header("USER PROFILE")
         
-        print(f"Username: {Colors.BOLD}{self.current_user.username}{Colors.ENDC}")
-        print(f"User ID: {self.current_user.id}")
-        print(f"Admin: {'Yes' if self.current_user.is_admin else 'No'}")
+        self._emit(f"Username: {Colors.BOLD}{self.current_user.username}{Colors.ENDC}")
+        self._emit(f"User ID: {self.current_user.id}")
+        self._emit(f"Admin: {'Yes' if self._is_admin else 'No'}")
         if self.current_user.created_at:
-            print(f"Member since: {self.current_user.created_at.strftime('%Y-%m-%d')}")
+            self._emit(f"Member since: {format_date(self.current_user.created_at)}")
         
         # Count sessions
-        sessions = self.external_session_repo.get_user_sessions(self.current_user.id)
-        print(f"Total sessions: {len(sessions)}")
+        self._emit(f"Total sessions: {self._get_session_count()}")
         
-        print("\n1. Change Password")
-        print("0. Back")
+        self._emit("\n1. Change Password")
+        self._emit("0. Back")
         
         choice = self.get_choice("Enter choice")
         
@@ -728,24 +1101,18 @@ class AdvancedCLI:
     
     def change_password(self):
         """Change user password."""
-        print("\n" + "="*40)
-        current = getpass.getpass("Current password: ")
-        
-        # Verify current password
-        success, _, _ = self.auth_service.login(self.current_user.username, current)
-        if not success:
-            self.print_error("Current password is incorrect")
-            return
-        
-        new_password = getpass.getpass("New password: ")
-        confirm = getpass.getpass("Confirm new password: ")
+        self._emit("\n" + "="*40)
+        current = self._prompt_password("Current password: ")
+        new_password = self._prompt_password("New password: ")
+        confirm = self._prompt_password("Confirm new password: ")
         
         if new_password != confirm:
             self.print_error("Passwords don't match")
             return
         
+        # change_password verifies the current password itself
         success, message = self.auth_service.change_password(
-            self.current_user.username,
+            self.current_user.id,
             current,
             new_password
         )
@@ -753,13 +1120,13 @@ class AdvancedCLI:
         if success:
             self.print_success("Password changed successfully")
         else:
-            self.print_error(f"Failed to change password: {message}")
+            self.print_error(message)
     
     # ========== Admin Panel ==========
     
     def admin_menu(self):
         """Show admin panel."""
-        if not self.current_user.is_admin:
+        if not self._is_admin:
             self.print_error("Access denied")
             return
         
@@ -767,20 +1134,13 @@ class AdvancedCLI:
             self.clear_screen()
             self.print_header("ADMIN PANEL")
             
-            print("1. List All Users")
-            print("2. Delete User")
-            print("3. System Statistics")
-            print("0. Back")
-            print()
+            self.render_menu(self._ADMIN_MENU, "Back")
             
             choice = self.get_choice("Enter choice")
+            handler = self.get_menu_handler(self._ADMIN_MENU, choice)
             
-            if choice == "1":
-                self.list_all_users()
-            elif choice == "2":
-                self.delete_user()
-            elif choice == "3":
-                self.show_statistics()
+            if handler:
+                handler()
             elif choice == "0":
                 break
             else:
@@ -794,15 +1154,16 @@ class AdvancedCLI:
         
         users = self.user_repo.find_all()
         
-        print(f"Total users: {len(users)}\n")
+        self._emit(f"Total users: {len(users)}\n")
+        
+        session_counts = self.external_session_repo.count_by_user_id()
         
         for user in users:
             admin_badge = " [ADMIN]" if user.is_admin else ""
-            created = user.created_at.strftime('%Y-%m-%d') if user.created_at else "Unknown"
-            sessions = self.external_session_repo.get_user_sessions(user.id)
+            created = format_date(user.created_at)
             
-            print(f"• {user.username}{admin_badge}")
-            print(f"  ID: {user.id} | Created: {created} | Sessions: {len(sessions)}")
+            self._emit(f"• {user.username}{admin_badge}")
+            self._emit(f"  ID: {user.id} | Created: {created} | Sessions: {session_counts.get(user.id, 0)}")
         
         self.pause()
     
@@ -833,11 +1194,12 @@ class AdvancedCLI:
         
         if confirm.lower() == 'y':
             success, message = self.auth_service.delete_user(
-                username,
-                self.current_user.username
+                self.current_user.id,
+                username
             )
             
             if success:
+                self._stats_cache = None
                 self.print_success(f"User '{username}' deleted")
             else:
                 self.print_error(f"Failed: {message}")
@@ -846,81 +1208,95 @@ class AdvancedCLI:
         
         self.pause()
     
+    def _get_statistics(self, ttl: float = STATS_CACHE_TTL) -> Dict[str, int]:
+        """Get system-wide counts, reusing a recent result if available.
+        
+        Args:
+            ttl: Maximum age in seconds of a cached result.
+        
+        Returns:
+            Dictionary with users, admins, external_sessions, internal_sessions
+            and checkpoints counts.
+        """
+        now = time.monotonic()
+        if self._stats_cache and now - self._stats_cache[0] < ttl:
+            return self._stats_cache[1]
+        
+        # Aggregate counts straight from the database
+        stats = {
+            'users': self.user_repo.count_all(),
+            'admins': self.user_repo.count_admins(),
+            'external_sessions': self.external_session_repo.count_all(),
+            'internal_sessions': self.internal_session_repo.count_all(),
+            'checkpoints': self.checkpoint_repo.total_count(),
+        }
+        self._stats_cache = (now, stats)
+        return stats
+    
     def show_statistics(self):
         """Show system statistics."""
         self.clear_screen()
         self.print_header("SYSTEM STATISTICS")
         
-        # Get all users
-        users = self.user_repo.find_all()
-        admin_count = sum(1 for u in users if u.is_admin)
-        
-        # Get all sessions
-        all_external_sessions = []
-        all_internal_sessions = []
-        total_checkpoints = 0
-        
-        for user in users:
-            ext_sessions = self.external_session_repo.get_user_sessions(user.id)
-            all_external_sessions.extend(ext_sessions)
-            
-            for ext_session in ext_sessions:
-                int_sessions = self.internal_session_repo.get_by_external_session(ext_session.id)
-                all_internal_sessions.extend(int_sessions)
-                
-                for int_session in int_sessions:
-                    total_checkpoints += int_session.checkpoint_count or 0
-        
-        print(f"{Colors.BOLD}Users:{Colors.ENDC}")
-        print(f"  Total: {len(users)}")
-        print(f"  Admins: {admin_count}")
-        print(f"  Regular: {len(users) - admin_count}")
-        
-        print(f"\n{Colors.BOLD}Sessions:{Colors.ENDC}")
-        print(f"  External Sessions: {len(all_external_sessions)}")
-        print(f"  Internal Sessions: {len(all_internal_sessions)}")
-        print(f"  Total Checkpoints: {total_checkpoints}")
-        
-        if all_external_sessions:
-            avg_internal = len(all_internal_sessions) / len(all_external_sessions)
-            print(f"  Avg Internal/External: {avg_internal:.1f}")
-        
-        if all_internal_sessions:
-            avg_checkpoints = total_checkpoints / len(all_internal_sessions)
-            print(f"  Avg Checkpoints/Session: {avg_checkpoints:.1f}")
-        
+        stats = self._get_statistics()
+        user_count = stats['users']
+        admin_count = stats['admins']
+        external_count = stats['external_sessions']
+        internal_count = stats['internal_sessions']
+        total_checkpoints = stats['checkpoints']
+        
+        bold, endc = Colors.BOLD, Colors.ENDC
+        lines = [
+            f"{bold}Users:{endc}",
+            f"  Total: {user_count}",
+            f"  Admins: {admin_count}",
+            f"  Regular: {user_count - admin_count}",
+            "",
+            f"{bold}Sessions:{endc}",
+            f"  External Sessions: {external_count}",
+            f"  Internal Sessions: {internal_count}",
+            f"  Total Checkpoints: {total_checkpoints}",
+        ]
+        
+        if external_count:
+            avg_internal = internal_count / external_count
+            lines.append(f"  Avg Internal/External: {avg_internal:.1f}")
+        
+        if internal_count:
+            avg_checkpoints = total_checkpoints / internal_count
+            lines.append(f"  Avg Checkpoints/Session: {avg_checkpoints:.1f}")
+        
+        self._emit("\n".join(lines))
         self.pause()
     
     # ========== Main Run ==========
     
     def run(self):
         """Run the CLI application."""
-        # Check if terminal supports colors
-        if not sys.stdout.isatty():
-            Colors.disable()
-        
         try:
             # Authentication
             if not self.auth_menu():
-                print("\nGoodbye!")
+                self._emit("\nGoodbye!")
                 return
             
             # Main application
             self.main_menu()
             
-            print("\nThank you for using Rollback Agent System!")
+            self._emit("\nThank you for using Rollback Agent System!")
             
         except KeyboardInterrupt:
-            print("\n\nInterrupted by user. Goodbye!")
+            self._emit("\n\nInterrupted by user. Goodbye!")
         except Exception as e:
-            print(f"\n{Colors.FAIL}Fatal error: {e}{Colors.ENDC}")
+            self._emit(f"\n{Colors.FAIL}Fatal error: {e}{Colors.ENDC}")
             raise
+        finally:
+            self._flush_output()
 
 
 def main():
     """Entry point for the advanced CLI."""
     # Check for API key
-    if not os.getenv("OPENAI_API_KEY"):
+    if not OPENAI_API_KEY:
         print("Error: OPENAI_API_KEY environment variable not set")
         print("Please set it before running:")
         print("  export OPENAI_API_KEY='your-api-key-here'")
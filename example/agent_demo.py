@@ -8,14 +8,10 @@ This shows how to:
 4. Handle rollback operations
 """
 
-import sys
 import os
 import asyncio
 from typing import Optional
 
-# Add parent directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from agno.models.openai import OpenAIChat
 from src.agents.agent_service import AgentService
 from src.agents.rollback_agent import RollbackAgent
@@ -25,6 +21,18 @@ from src.database.repositories.external_session_repository import ExternalSessio
 from src.sessions.external_session import ExternalSession
 from datetime import datetime
 
+try:
+    import readline  # Line editing and history for input(); unavailable on Windows
+except ImportError:
+    readline = None
+
+
+# Read once at import; checked before the demo starts
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Where the demo keeps prompt history between runs
+HISTORY_FILE = os.path.expanduser("~/.rollback_demo_history")
+
 
 class AgentDemo:
     """Demo class showing RollbackAgent capabilities."""
@@ -53,13 +61,10 @@ class AgentDemo:
         success, user, _ = self.auth_service.login("demo_user", "demo123")
         
         if not success:
-            # Register demo user
+            # Register demo user; registration returns the saved user, so no second login
             success, user, message = self.auth_service.register(
                 "demo_user", "demo123", "demo123"
             )
-            if success:
-                # Login after registration
-                success, user, _ = self.auth_service.login("demo_user", "demo123")
         
         if success and user:
             print(f"✓ Demo user ready: {user.username}")
@@ -76,10 +81,11 @@ class AgentDemo:
         Returns:
             The created external session.
         """
+        now = datetime.now()
         session = ExternalSession(
             user_id=user_id,
-            session_name=f"Demo Session {datetime.now().strftime('%H:%M')}",
-            created_at=datetime.now()
+            session_name=f"Demo Session {now.strftime('%H:%M')}",
+            created_at=now
         )
         
         saved_session = self.external_session_repo.create(session)
@@ -101,6 +107,23 @@ class AgentDemo:
         print("• Type 'exit' to quit")
         print("\n" + "-"*60 + "\n")
         
+        if readline:
+            try:
+                readline.read_history_file(HISTORY_FILE)
+            except OSError:
+                pass
+        
+        try:
+            self._conversation_loop()
+        finally:
+            if readline:
+                try:
+                    readline.write_history_file(HISTORY_FILE)
+                except OSError:
+                    pass
+    
+    def _conversation_loop(self):
+        """Read user messages and run the agent until the user exits."""
         while True:
             try:
                 # Get user input
@@ -113,16 +136,13 @@ class AgentDemo:
                 if not user_input:
                     continue
                 
-                # Run the agent
+                # Run the agent, printing the response as it streams in
                 print("\nAgent: ", end="", flush=True)
-                response = self.current_agent.run(user_input)
-                
-                # Print response
-                if hasattr(response, 'content'):
-                    print(response.content)
-                else:
-                    print(response)
-                
+                for chunk in self.current_agent.run_stream(user_input):
+                    print(chunk, end="", flush=True)
+                print()
+                response = self.current_agent.run_response
+
                 # Check for rollback request
                 if self.agent_service.handle_agent_response(self.current_agent, response):
                     checkpoint_id = self.current_agent.session_state.get('rollback_checkpoint_id')
@@ -191,8 +211,8 @@ class AgentDemo:
                     self.current_agent.internal_session.id
                 )
                 
-                auto_count = sum(1 for cp in final_checkpoints if cp.is_auto)
-                manual_count = sum(1 for cp in final_checkpoints if not cp.is_auto)
+                auto_count = sum(cp.is_auto for cp in final_checkpoints)
+                manual_count = len(final_checkpoints) - auto_count
                 
                 print(f"Total Checkpoints: {len(final_checkpoints)}")
                 print(f"  • Automatic: {auto_count}")
@@ -211,8 +231,7 @@ class AgentDemo:
 def main():
     """Main entry point for the demo."""
     # Check for OpenAI API key
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if not OPENAI_API_KEY:
         print("\n⚠️  Warning: OPENAI_API_KEY environment variable not set!")
         print("Please set your OpenAI API key:")
         print("  export OPENAI_API_KEY='your-api-key-here'")
@@ -8,17 +8,10 @@ This demonstrates the full workflow:
 4. Admin features for rootusr
 """
 
-import sys
-import os
-
-# Add parent directory to path to import our modules
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from src.ui.cli import main
 
 
-if __name__ == "__main__":
-    print("""
+BANNER = """
     ╔══════════════════════════════════════════════════════════╗
     ║          Rollback Agent System - CLI Demo               ║
     ╠══════════════════════════════════════════════════════════╣
@@ -32,7 +25,11 @@ if __name__ == "__main__":
     ║  Username: rootusr                                      ║
     ║  Password: 1234                                         ║
     ╚══════════════════════════════════════════════════════════╝
-    """)
+"""
+
+
+if __name__ == "__main__":
+    print(BANNER)
     
     # Run the CLI
     main()
\ No newline at end of file
@@ -5,16 +5,16 @@ Test script to verify automatic checkpoint creation with custom tools.
 
 import os
 import sys
-from pathlib import Path
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.agents.agent_service import AgentService
 from src.auth.auth_service import AuthService
 from src.sessions.external_session import ExternalSession
 from src.database.repositories.external_session_repository import ExternalSessionRepository
 
+# Model connection settings, read once at import (align with test_key.py)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+BASE_URL = os.getenv("OPENAI_BASE_URL") or os.getenv("BASE_URL")
+
 
 def simple_calculator(a: float, b: float) -> float:
     """Add two numbers together."""
@@ -25,6 +25,10 @@ def simple_calculator_reverse(args, result):
     # In a real tool that changes external state, implement reversal here.
     return None
 
+def _text(response):
+    """Return the text content of an agent response."""
+    return getattr(response, 'content', response)
+
 def main():
     """Test automatic checkpoint creation."""
     
@@ -48,33 +52,28 @@ def main():
     # Create agent with custom tool
     agent_service = AgentService()
 
-    # Read model connection settings (align with test_key.py)
-    base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("BASE_URL")
-    api_key = os.getenv("OPENAI_API_KEY")
-
     agent = agent_service.create_new_agent(
         external_session_id=external_session.id,
         tools=[simple_calculator],
         reverse_tools={"simple_calculator": simple_calculator_reverse},
-        base_url=base_url,
-        api_key=api_key
+        base_url=BASE_URL,
+        api_key=OPENAI_API_KEY
         # show_tool_calls=True is already set by default in agent_service
     )
     
     print("Agent created with custom calculator tool\n")
     
     # Initial checkpoint count
-    initial_checkpoints = agent.checkpoint_repo.get_by_internal_session(
-        agent.internal_session.id,
-        auto_only=False
-    )
-    print(f"Initial checkpoints: {len(initial_checkpoints)}")
+    initial_count = agent.checkpoint_repo.count_checkpoints(
+        agent.internal_session.id
+    )['total']
+    print(f"Initial checkpoints: {initial_count}")
     
     # Test 1: Use custom tool
     print("\nTest 1: Using custom tool")
     print("User: Calculate 5 + 3")
     response = agent.run("Calculate 5 + 3 using the calculator tool")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # Check if response has tool_calls attribute
     print(f"\nResponse has tool_calls: {hasattr(response, 'tool_calls')}")
@@ -91,24 +90,22 @@ def main():
         print(f"Could not read tool track: {e}")
 
     # Check checkpoints after custom tool
-    checkpoints_after_custom = agent.checkpoint_repo.get_by_internal_session(
-        agent.internal_session.id,
-        auto_only=False
-    )
-    print(f"\nCheckpoints after custom tool: {len(checkpoints_after_custom)}")
+    count_after_custom = agent.checkpoint_repo.count_checkpoints(
+        agent.internal_session.id
+    )['total']
+    print(f"\nCheckpoints after custom tool: {count_after_custom}")
     
     # Test 2: Use checkpoint tool
     print("\nTest 2: Using checkpoint tool")
     print("User: Create checkpoint 'Test'")
     response = agent.run("Create checkpoint 'Test'")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # Check checkpoints after checkpoint tool
-    checkpoints_after_checkpoint = agent.checkpoint_repo.get_by_internal_session(
-        agent.internal_session.id,
-        auto_only=False
-    )
-    print(f"\nCheckpoints after checkpoint tool: {len(checkpoints_after_checkpoint)}")
+    count_after_checkpoint = agent.checkpoint_repo.count_checkpoints(
+        agent.internal_session.id
+    )['total']
+    print(f"\nCheckpoints after checkpoint tool: {count_after_checkpoint}")
     
     # Optionally demonstrate tool rollback (reverse handlers)
     print("\nAttempting to rollback recorded tool effects...")
@@ -132,8 +129,8 @@ def main():
         print(f"  [{checkpoint_type}] ID: {cp.id} | {name}")
     
     # Summary
-    auto_count = sum(1 for cp in all_checkpoints if cp.is_auto)
-    manual_count = sum(1 for cp in all_checkpoints if not cp.is_auto)
+    auto_count = sum(cp.is_auto for cp in all_checkpoints)
+    manual_count = len(all_checkpoints) - auto_count
     
     print(f"\nSummary:")
     print(f"  Automatic checkpoints: {auto_count}")
@@ -148,7 +145,7 @@ def main():
 
 
 if __name__ == "__main__":
-    if not os.getenv("OPENAI_API_KEY"):
+    if not OPENAI_API_KEY:
         print("Please set OPENAI_API_KEY environment variable")
         sys.exit(1)
     
@@ -13,24 +13,25 @@ import sys
 from pathlib import Path
 from time import sleep
 
-# Ensure project root is on sys.path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from src.agents.agent_service import AgentService
 from src.auth.auth_service import AuthService
 from src.sessions.external_session import ExternalSession
 from src.database.repositories.external_session_repository import ExternalSessionRepository
 
-sleep_n = 2 # SLEEP TIME FOR DEBUG
+# Model connection settings, read once at import (align with test_key.py)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+BASE_URL = os.getenv("OPENAI_BASE_URL") or os.getenv("BASE_URL")
+
+sleep_n = float(os.getenv("DEBUG_SLEEP", "0"))  # Pause between steps when debugging, e.g. DEBUG_SLEEP=2
 
 def create_file(path: str) -> dict:
-    open(path, "w").close()
+    Path(path).touch()
     return {"path": path}
 
 
 def delete_file(args, result):
     file_path = result.get("path") if isinstance(result, dict) else None
-    if file_path and os.path.exists(file_path):
+    if file_path and Path(file_path).exists():
         os.remove(file_path)
     return None
 
@@ -52,15 +53,13 @@ def main():
 
     # Agent
     agent_service = AgentService()
-    base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("BASE_URL")
-    api_key = os.getenv("OPENAI_API_KEY")
 
     agent = agent_service.create_new_agent(
         external_session_id=external_session.id,
         tools=[create_file],
         reverse_tools={"create_file": delete_file},
-        base_url=base_url,
-        api_key=api_key,
+        base_url=BASE_URL,
+        api_key=OPENAI_API_KEY,
     )
 
     test_path = "conv_tool_file.txt"
@@ -78,7 +77,7 @@ def main():
     for rec in track:
         print(f"  - {rec.tool_name} args={{'path': '{rec.args.get('path')}'}} success={rec.success}")
 
-    print(f"File exists before rollback: {os.path.exists(test_path)}")
+    print(f"File exists before rollback: {Path(test_path).exists()}")
 
     # Rollback  
     sleep(sleep_n)
@@ -86,7 +85,7 @@ def main():
     for rr in reverse_results:
         print(f"  - reversed {rr.tool_name}: success={rr.reversed_successfully} error={rr.error_message}")
 
-    print(f"File exists after rollback: {os.path.exists(test_path)}")
+    print(f"File exists after rollback: {Path(test_path).exists()}")
 
     # Redo
     sleep(sleep_n)
@@ -94,11 +93,11 @@ def main():
     for r in redo_results:
         print(f"  - redo {r.tool_name}: success={r.success} error={r.error_message}")
 
-    print(f"File exists after redo: {os.path.exists(test_path)}")
+    print(f"File exists after redo: {Path(test_path).exists()}")
 
 
 if __name__ == "__main__":
-    if not os.getenv("OPENAI_API_KEY"):
+    if not OPENAI_API_KEY:
         print("Please set OPENAI_API_KEY environment variable")
         sys.exit(1)
     main()
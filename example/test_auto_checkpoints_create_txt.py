@@ -8,29 +8,34 @@ import sys
 from pathlib import Path
 from time import sleep
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from src.agents.agent_service import AgentService
 from src.auth.auth_service import AuthService
 from src.sessions.external_session import ExternalSession
 from src.database.repositories.external_session_repository import ExternalSessionRepository
 
-sleep_n = 2 # SLEEP TIME FOR DEBUG
+# Model connection settings, read once at import (align with test_key.py)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+BASE_URL = os.getenv("OPENAI_BASE_URL") or os.getenv("BASE_URL")
+
+sleep_n = float(os.getenv("DEBUG_SLEEP", "0"))  # Pause between steps when debugging, e.g. DEBUG_SLEEP=2
 
 def create_file(path: str) -> dict:
     """Create an empty file and return its path."""
-    open(path, "w").close()
+    Path(path).touch()
     return {"path": path}
 
 def delete_file(args, result):
     """Reverse handler to delete the created file if it exists."""
     import os as _os
     file_path = result.get("path") if isinstance(result, dict) else None
-    if file_path and _os.path.exists(file_path):
+    if file_path and Path(file_path).exists():
         _os.remove(file_path)
     return None
 
+def _text(response):
+    """Return the text content of an agent response."""
+    return getattr(response, 'content', response)
+
 def main():
     """Test automatic checkpoint creation."""
     
@@ -54,16 +59,12 @@ def main():
     # Create agent with custom tool
     agent_service = AgentService()
 
-    # Read model connection settings (align with test_key.py)
-    base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("BASE_URL")
-    api_key = os.getenv("OPENAI_API_KEY")
-
     agent = agent_service.create_new_agent(
         external_session_id=external_session.id,
         tools=[create_file],
         reverse_tools={"create_file": delete_file},
-        base_url=base_url,
-        api_key=api_key
+        base_url=BASE_URL,
+        api_key=OPENAI_API_KEY
         # show_tool_calls=True is already set by default in agent_service
     )
     
@@ -71,18 +72,17 @@ def main():
     sleep(sleep_n)
     
     # Initial checkpoint count
-    initial_checkpoints = agent.checkpoint_repo.get_by_internal_session(
-        agent.internal_session.id,
-        auto_only=False
-    )
-    print(f"Initial checkpoints: {len(initial_checkpoints)}")
+    initial_count = agent.checkpoint_repo.count_checkpoints(
+        agent.internal_session.id
+    )['total']
+    print(f"Initial checkpoints: {initial_count}")
     
     # Test 1: Use custom tool to create a file
     test_path = "tmp_test_file.txt"
     print("\nTest 1: Using custom tool to create a file")
     print(f"User: Create file at {test_path}")
     response = agent.run(f"Use the create_file tool to create {test_path}")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     sleep(sleep_n)
     
     # Check if response has tool_calls attribute
@@ -100,27 +100,25 @@ def main():
         print(f"Could not read tool track: {e}")
 
     # Check checkpoints after custom tool
-    checkpoints_after_custom = agent.checkpoint_repo.get_by_internal_session(
-        agent.internal_session.id,
-        auto_only=False
-    )
-    print(f"\nCheckpoints after custom tool: {len(checkpoints_after_custom)}")
+    count_after_custom = agent.checkpoint_repo.count_checkpoints(
+        agent.internal_session.id
+    )['total']
+    print(f"\nCheckpoints after custom tool: {count_after_custom}")
     
     # Test 2: Use checkpoint tool
     print("\nTest 2: Using checkpoint tool")
     print("User: Create checkpoint 'Test'")
     response = agent.run("Create checkpoint 'Test'")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # Check checkpoints after checkpoint tool
-    checkpoints_after_checkpoint = agent.checkpoint_repo.get_by_internal_session(
-        agent.internal_session.id,
-        auto_only=False
-    )
-    print(f"\nCheckpoints after checkpoint tool: {len(checkpoints_after_checkpoint)}")
+    count_after_checkpoint = agent.checkpoint_repo.count_checkpoints(
+        agent.internal_session.id
+    )['total']
+    print(f"\nCheckpoints after checkpoint tool: {count_after_checkpoint}")
     
     # Verify file exists before rollback
-    print(f"\nFile exists before rollback: {os.path.exists(test_path)}")
+    print(f"\nFile exists before rollback: {Path(test_path).exists()}")
 
     # Optionally demonstrate tool rollback (reverse handlers)
     print("\nAttempting to rollback recorded tool effects...")
@@ -133,7 +131,7 @@ def main():
         print(f"Rollback failed: {e}")
 
     # Verify file removed after rollback
-    print(f"File exists after rollback: {os.path.exists(test_path)}")
+    print(f"File exists after rollback: {Path(test_path).exists()}")
 
     # Demonstrate redo (recreate the file via forward tool replay)
     try:
@@ -145,12 +143,12 @@ def main():
         print(f"Redo failed: {e}")
 
     # Verify file re-created after redo
-    print(f"File exists after redo: {os.path.exists(test_path)}")
+    print(f"File exists after redo: {Path(test_path).exists()}")
 
 
 
 if __name__ == "__main__":
-    if not os.getenv("OPENAI_API_KEY"):
+    if not OPENAI_API_KEY:
         print("Please set OPENAI_API_KEY environment variable")
         sys.exit(1)
     
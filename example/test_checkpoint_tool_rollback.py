@@ -12,17 +12,17 @@ This script:
 
 import os
 import sys
-from pathlib import Path
 from time import sleep
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from src.agents.agent_service import AgentService
 from src.auth.auth_service import AuthService
 from src.sessions.external_session import ExternalSession
 from src.database.repositories.external_session_repository import ExternalSessionRepository
 
+# Model connection settings, read once at import (align with test_key.py)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+BASE_URL = os.getenv("OPENAI_BASE_URL") or os.getenv("BASE_URL")
+
 
 def create_file(path: str) -> dict:
     """Create an empty file and return its path."""
@@ -88,8 +88,6 @@ def main():
     
     # Create agent with file tools
     agent_service = AgentService()
-    base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("BASE_URL")
-    api_key = os.getenv("OPENAI_API_KEY")
 
     agent = agent_service.create_new_agent(
         external_session_id=external_session.id,
@@ -98,8 +96,8 @@ def main():
             "create_file": delete_file,
             "write_text_file": delete_text_file
         },
-        base_url=base_url,
-        api_key=api_key
+        base_url=BASE_URL,
+        api_key=OPENAI_API_KEY
     )
     
     print("Agent created with file creation tools\n")
@@ -237,7 +235,7 @@ def main():
 
 
 if __name__ == "__main__":
-    if not os.getenv("OPENAI_API_KEY"):
+    if not OPENAI_API_KEY:
         print("Please set OPENAI_API_KEY environment variable")
         sys.exit(1)
     
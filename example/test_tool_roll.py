@@ -1,10 +1,5 @@
-import os
-import sys
 from time import sleep
 
-# Ensure project root is on sys.path when running this file directly
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
 from rollback_portocal import ToolRollbackRegistry, ToolSpec
 if __name__ == "__main__":
 
@@ -13,18 +13,22 @@ available in your application (e.g., around tool execution).
 
 from .protocol import (
     CHECKPOINT_TOOL_NAMES,
+    CHECKPOINT_TOOL_NAMES_SET,
     ToolInvocationRecord,
     ToolSpec,
     ReverseInvocationResult,
+    SchemaArgs,
 )
 from .registry import ToolRollbackRegistry
 from .adapters import AgnoToolkitAdapter
 
 __all__ = [
     "CHECKPOINT_TOOL_NAMES",
+    "CHECKPOINT_TOOL_NAMES_SET",
     "ToolInvocationRecord",
     "ToolSpec",
     "ReverseInvocationResult",
+    "SchemaArgs",
     "ToolRollbackRegistry",
     "AgnoToolkitAdapter",
 ]
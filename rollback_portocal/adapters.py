@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence
+import asyncio
+import functools
+import inspect
+import operator
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 try:
     # Optional import: only needed if using Agno toolkits
@@ -8,7 +15,7 @@ try:
 except Exception:  # pragma: no cover - when agno is not available in env
     Toolkit = object  # Fallback to allow type annotations
 
-from .protocol import CHECKPOINT_TOOL_NAMES, ToolSpec
+from .protocol import CHECKPOINT_TOOL_NAMES_SET, ForwardTool, ReverseTool, ToolSpec
 from .registry import ToolRollbackRegistry
 
 
@@ -20,39 +27,152 @@ class AgnoToolkitAdapter:
     - tool_names: list of forward tool names to expose
     - reverse_map: mapping of tool_name -> reverse callable
       (reverse is required unless tool_name in CHECKPOINT_TOOL_NAMES)
+
+    Independent tool calls can be run concurrently with `execute_and_record_many`
+    on a per-adapter thread pool sized by TOOL_CONCURRENCY_LIMIT (default 8).
+    Asyncio hosts can use `aexecute_and_record`/`aexecute_and_record_many`, which
+    await coroutine tools directly and offload sync tools to that pool.
     """
 
+    __slots__ = ("toolkit", "registry", "_dispatch", "_pool")
+
     def __init__(self, toolkit: Toolkit, registry: Optional[ToolRollbackRegistry] = None) -> None:
         self.toolkit = toolkit
         self.registry = registry or ToolRollbackRegistry()
+        # name -> (forward, reverse) for tools registered through this adapter
+        self._dispatch: Dict[str, Tuple[ForwardTool, Optional[ReverseTool]]] = {}
+        self._pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("TOOL_CONCURRENCY_LIMIT", "8")),
+            thread_name_prefix="rollback-tool",
+        )
 
     def register_tools(
         self,
         tool_names: Sequence[str],
         reverse_map: Mapping[str, Callable[[Mapping[str, Any], Any], Any]],
     ) -> None:
-        for name in tool_names:
-            forward = getattr(self.toolkit, name, None)
+        names = [sys.intern(name) for name in tool_names]
+        if not names:
+            return
+
+        try:
+            forwards = operator.attrgetter(*names)(self.toolkit)
+        except AttributeError:
+            missing = next(name for name in names if not hasattr(self.toolkit, name))
+            raise AttributeError(f"Toolkit has no callable tool '{missing}'") from None
+        if len(names) == 1:
+            forwards = (forwards,)
+
+        checkpoint_names = CHECKPOINT_TOOL_NAMES_SET
+        specs = []
+        for name, forward in zip(names, forwards):
             if not callable(forward):
                 raise AttributeError(f"Toolkit has no callable tool '{name}'")
 
-            reverse = reverse_map.get(name)
-            if name in CHECKPOINT_TOOL_NAMES:
-                reverse = None
+            reverse = None if name in checkpoint_names else reverse_map.get(name)
+            specs.append(ToolSpec(name=name, forward=forward, reverse=reverse))
 
-            self.registry.register_tool(ToolSpec(name=name, forward=forward, reverse=reverse))
+        self.registry.register_tools(specs)
+        self._dispatch.update((spec.name, (spec.forward, spec.reverse)) for spec in specs)
 
     def execute_and_record(self, tool_name: str, args: Mapping[str, Any]) -> Any:
-        spec = self.registry.get_tool(tool_name)
-        if not spec:
-            raise ValueError(f"Tool '{tool_name}' is not registered in rollback registry")
+        """Execute one tool and record the invocation.
 
+        Plain dicts are passed to the tool as-is; other mappings are converted
+        to a dict once. Args are never deep-copied, so tools must not mutate
+        them (the registry keeps its own shallow copy for the track).
+        """
+        forward = self._get_forward(tool_name)
+        call_args = args if type(args) is dict else dict(args)
+        record = self.registry.record_invocation
         try:
-            result = spec.forward(args)
-            self.registry.record_invocation(tool_name, args, result, success=True)
-            return result
+            result = forward(call_args)
         except Exception as e:
-            self.registry.record_invocation(tool_name, args, None, success=False, error_message=str(e))
+            record(tool_name, call_args, None, success=False, error_message=str(e))
             raise
+        record(tool_name, call_args, result, success=True)
+        return result
+
+    def execute_and_record_many(self, calls: Sequence[Tuple[str, Mapping[str, Any]]]) -> List[Any]:
+        """Execute independent tool calls concurrently and record them in order.
+
+        Forward tools run on the adapter's thread pool. Invocations are recorded
+        on the calling thread in submission order, so the track stays replayable
+        regardless of completion order. If any call fails, every call is still
+        recorded and the first error (in submission order) is re-raised.
+        """
+        forwards = [self._get_forward(tool_name) for tool_name, _ in calls]
+        futures = [self._pool.submit(forward, args) for forward, (_, args) in zip(forwards, calls)]
+
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+        return self._record_outcomes(calls, outcomes)
+
+    async def aexecute_and_record(self, tool_name: str, args: Mapping[str, Any]) -> Any:
+        return (await self.aexecute_and_record_many([(tool_name, args)]))[0]
+
+    async def aexecute_and_record_many(
+        self, calls: Sequence[Tuple[str, Mapping[str, Any]]]
+    ) -> List[Any]:
+        """Async variant of `execute_and_record_many`.
+
+        Coroutine tools are awaited on the running loop; sync tools run on the
+        adapter's thread pool so they do not block it. All calls are gathered
+        concurrently and recorded in submission order once they complete.
+        """
+        forwards = [self._get_forward(tool_name) for tool_name, _ in calls]
+        loop = asyncio.get_running_loop()
+
+        awaitables = []
+        for forward, (_, args) in zip(forwards, calls):
+            if inspect.iscoroutinefunction(forward):
+                awaitables.append(forward(args))
+            else:
+                awaitables.append(
+                    loop.run_in_executor(self._pool, functools.partial(forward, args))
+                )
+
+        outcomes = await asyncio.gather(*awaitables, return_exceptions=True)
+        return self._record_outcomes(calls, outcomes)
+
+    def _get_forward(self, tool_name: str) -> ForwardTool:
+        entry = self._dispatch.get(tool_name)
+        if entry is not None:
+            return entry[0]
+
+        # Fall back to tools registered on the registry directly
+        spec = self.registry.get_tool(tool_name)
+        if not spec:
+            raise ValueError(f"Tool '{tool_name}' is not registered in rollback registry")
+        return spec.forward
+
+    def _record_outcomes(
+        self,
+        calls: Sequence[Tuple[str, Mapping[str, Any]]],
+        outcomes: Sequence[Any],
+    ) -> List[Any]:
+        """Record each call's result or exception in order; re-raise the first error."""
+        record = self.registry.record_invocation
+        results: List[Any] = []
+        first_error: Optional[BaseException] = None
+        for (tool_name, args), outcome in zip(calls, outcomes):
+            if isinstance(outcome, BaseException):
+                record(tool_name, args, None, success=False, error_message=str(outcome))
+                results.append(None)
+                if first_error is None:
+                    first_error = outcome
+            else:
+                record(tool_name, args, outcome, success=True)
+                results.append(outcome)
 
+        if first_error is not None:
+            raise first_error
+        return results
 
+    def close(self) -> None:
+        """Shut down the adapter's tool thread pool."""
+        self._pool.shutdown(wait=True)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 
 # Tools that act as logical checkpoints and do not require reverse handlers.
@@ -20,6 +21,9 @@ CHECKPOINT_TOOL_NAMES: Tuple[str, ...] = (
     "cleanup_auto_checkpoints_tool",
 )
 
+# Set form of CHECKPOINT_TOOL_NAMES for O(1) membership checks on hot paths
+CHECKPOINT_TOOL_NAMES_SET: FrozenSet[str] = frozenset(map(sys.intern, CHECKPOINT_TOOL_NAMES))
+
 
 # Callable signatures for forward and reverse tool handlers
 ForwardTool = Callable[[Mapping[str, Any]], Any]
@@ -32,37 +36,102 @@ class ToolSpec:
 
     A reverse tool is required unless the tool's name is in CHECKPOINT_TOOL_NAMES.
     The reverse tool receives the original args and the forward result.
+    Mark a tool `independent` when its reverse calls do not depend on each other
+    (e.g. deleting distinct files), so rollback may run them concurrently.
+    `identity_key(args, result)` names the resource a call acts on (e.g. its
+    path); a coalescing rollback reverses only the newest call per resource.
+    `result_summary(result)`, when set, is stored on the record instead of the
+    full result, for tools whose reverse needs only part of a large result.
+    `arg_schema` lists the tool's argument names; calls passing exactly those
+    arguments are recorded as a compact SchemaArgs instead of a dict copy.
     """
 
     name: str
     forward: ForwardTool
     reverse: Optional[ReverseTool] = None
+    independent: bool = False
+    identity_key: Optional[Callable[[Mapping[str, Any], Any], Hashable]] = None
+    result_summary: Optional[Callable[[Any], Any]] = None
+    arg_schema: Optional[Tuple[str, ...]] = None
+    _is_checkpoint: bool = field(init=False, repr=False, compare=False)
+    _arg_index: Optional[Dict[str, int]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Frozen dataclass: set the derived fields once, bypassing __setattr__
+        object.__setattr__(self, "_is_checkpoint", self.name in CHECKPOINT_TOOL_NAMES_SET)
+        arg_index = None
+        if self.arg_schema is not None:
+            arg_index = {name: i for i, name in enumerate(self.arg_schema)}
+        object.__setattr__(self, "_arg_index", arg_index)
+
+    @property
+    def is_checkpoint(self) -> bool:
+        return self._is_checkpoint
 
     def validate(self) -> None:
-        if self.name not in CHECKPOINT_TOOL_NAMES and self.reverse is None:
+        if not self._is_checkpoint and self.reverse is None:
             raise ValueError(
                 f"Tool '{self.name}' must register a reverse handler unless it is a checkpoint tool."
             )
 
 
-@dataclass
+class SchemaArgs(Mapping[str, Any]):
+    """Read-only args mapping backed by a tuple of values in schema order.
+
+    The name-to-position index is shared by every record of the same tool,
+    so each record stores only its values.
+    """
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index: Dict[str, int], values: Tuple[Any, ...]) -> None:
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"SchemaArgs({dict(self)!r})"
+
+
+@dataclass(slots=True)
 class ToolInvocationRecord:
-    """A single tool invocation captured for rollback/redo."""
+    """A single tool invocation captured for rollback/redo.
+
+    `record_invocation` stores a shallow copy of `args`, so later changes to
+    the caller's mapping do not leak into rollback or redo; the fast path and
+    redo share args by reference instead. Recorded args, nested values and
+    `result` must be treated as read-only.
+    `epoch` is the record's track position, assigned by the registry when the
+    record is appended (-1 for records that were never appended).
+    For tools with an `arg_schema`, `args` may be a SchemaArgs; use
+    `args_as_dict()` where a real dict is needed.
+    """
 
     tool_name: str
-    args: Dict[str, Any]
+    args: Mapping[str, Any]
     result: Any
     success: bool
     error_message: Optional[str] = None
-    timestamp: datetime = datetime.utcnow()
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    epoch: int = -1
 
+    def args_as_dict(self) -> Dict[str, Any]:
+        args = self.args
+        return args if type(args) is dict else dict(args)
 
-@dataclass
+
+@dataclass(slots=True)
 class ReverseInvocationResult:
     """Result of invoking a reverse tool during rollback."""
 
     tool_name: str
     reversed_successfully: bool
     error_message: Optional[str] = None
-
-
@@ -1,15 +1,34 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Sequence
+import logging
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from operator import attrgetter
+from typing import Any, Callable, Deque, Dict, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
 from .protocol import (
-    CHECKPOINT_TOOL_NAMES,
+    CHECKPOINT_TOOL_NAMES_SET,
     ReverseInvocationResult,
+    SchemaArgs,
     ToolInvocationRecord,
     ToolSpec,
 )
 
 
+logger = logging.getLogger(__name__)
+
+_by_epoch = attrgetter("epoch")
+
+# Queued by close() to stop the record-sink writer thread
+_STOP = object()
+
+
 class ToolRollbackRegistry:
     """Registry that enforces reverse tool registration and supports rollback/redo.
 
@@ -26,16 +45,62 @@ class ToolRollbackRegistry:
 
         # To redo, it will re-run forward tools in original order:
         registry.redo()
+
+    Pass `max_track_len` to keep only the most recent records. Track positions
+    (see `track_position`) stay absolute, so positions saved before older
+    records were dropped still address the same records.
+
+    Pass `record_sink` to persist records: they are queued on the hot path and
+    handed to the sink in batches of up to `sink_batch_size` by a background
+    writer thread. `flush()` waits for the queue to drain; `rollback()` calls
+    it first so everything being reversed has been persisted. If the sink
+    raises, the error is logged and that batch is dropped, not retried.
+    `close()` drains the queue and stops the writer thread.
+
+    Ordering: each appended record gets a unique, increasing `epoch`. Appends
+    take no lock, so when tools record from several threads the track (and
+    `get_track()`) may hold neighbouring records slightly out of epoch order.
+    `rollback()` and `redo()` sort by epoch, so they always reverse and replay
+    in the order invocations were recorded.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        max_track_len: Optional[int] = None,
+        record_sink: Optional[Callable[[List[ToolInvocationRecord]], None]] = None,
+        sink_batch_size: int = 32,
+    ) -> None:
         self._tools: Dict[str, ToolSpec] = {}
-        self._track: List[ToolInvocationRecord] = []
+        self._track: Deque[ToolInvocationRecord] = deque(maxlen=max_track_len)
+        # Monotonic position handed to each record; appends take no lock
+        self._epoch = count()
+        self._lock = threading.Lock()
+        # Raw (tool_name, args, result, success, error_message, time_ns) tuples from
+        # record_invocation_fast, turned into records the next time the track is read
+        self._pending: Deque[Tuple[str, Mapping[str, Any], Any, bool, Optional[str], int]] = deque()
+        self._record_sink = record_sink
+        self._write_q: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        if record_sink is not None:
+            self._write_q = queue.Queue()
+            self._writer = threading.Thread(
+                target=self._flush_loop,
+                args=(sink_batch_size,),
+                name="rollback-track-writer",
+                daemon=True,
+            )
+            self._writer.start()
 
-    # Registration
+    # Registration (tool names are interned so lookups compare keys by identity)
     def register_tool(self, spec: ToolSpec) -> None:
         spec.validate()
-        self._tools[spec.name] = spec
+        self._tools[sys.intern(spec.name)] = spec
+
+    def register_tools(self, specs: Sequence[ToolSpec]) -> None:
+        """Register several tools at once; nothing is registered if any spec is invalid."""
+        for spec in specs:
+            spec.validate()
+        self._tools.update((sys.intern(spec.name), spec) for spec in specs)
 
     def get_tool(self, name: str) -> Optional[ToolSpec]:
         return self._tools.get(name)
@@ -49,98 +114,290 @@ class ToolRollbackRegistry:
         success: bool,
         error_message: Optional[str] = None,
     ) -> None:
+        self._materialize()
         record = ToolInvocationRecord(
-            tool_name=tool_name,
-            args=dict(args),
-            result=result,
+            tool_name=sys.intern(tool_name),
+            args=self._stored_args(tool_name, args),
+            result=self._stored_result(tool_name, result),
             success=success,
             error_message=error_message,
         )
+        self._append(record)
+
+    def record_invocation_fast(
+        self,
+        tool_name: str,
+        args: Mapping[str, Any],
+        result: Any,
+        success: bool,
+        error_message: Optional[str] = None,
+    ) -> None:
+        """Record an invocation without building a ToolInvocationRecord yet.
+
+        The call is queued as a plain tuple and materialized, in order and with
+        its original timestamp, the next time the track is read. Unlike
+        `record_invocation`, a dict `args` is kept by reference, not copied, so
+        the caller must not mutate it afterwards.
+        """
+        self._pending.append((sys.intern(tool_name), args, result, success, error_message, time.time_ns()))
+
+    def _materialize(self) -> None:
+        pending = self._pending
+        if not pending:
+            return
+        # Lock so concurrent readers cannot append drained entries out of order
+        with self._lock:
+            while pending:
+                tool_name, args, result, success, error_message, ts = pending.popleft()
+                self._append(ToolInvocationRecord(
+                    tool_name=tool_name,
+                    args=args if type(args) is dict else dict(args),
+                    result=self._stored_result(tool_name, result),
+                    success=success,
+                    error_message=error_message,
+                    timestamp=datetime.fromtimestamp(ts / 1e9, tz=timezone.utc),
+                ))
+
+    def _stored_args(self, tool_name: str, args: Mapping[str, Any]) -> Mapping[str, Any]:
+        spec = self._tools.get(tool_name)
+        arg_index = spec._arg_index if spec is not None else None
+        if arg_index is None or len(args) != len(arg_index):
+            return dict(args)
+        try:
+            return SchemaArgs(arg_index, tuple([args[name] for name in spec.arg_schema]))
+        except KeyError:
+            # Same number of arguments but not the declared names
+            return dict(args)
+
+    def _stored_result(self, tool_name: str, result: Any) -> Any:
+        spec = self._tools.get(tool_name)
+        if spec is None or spec.result_summary is None or result is None:
+            return result
+        return spec.result_summary(result)
+
+    def _append(self, record: ToolInvocationRecord) -> None:
+        # next() on a count and deque.append are each atomic under the GIL
+        record.epoch = next(self._epoch)
         self._track.append(record)
+        if self._write_q is not None:
+            self._write_q.put(record)
+
+    def _extend(self, records: List[ToolInvocationRecord]) -> None:
+        # A count cannot be advanced by n atomically, so take one epoch per record
+        epoch = self._epoch
+        for record in records:
+            record.epoch = next(epoch)
+        self._track.extend(records)
+        write_q = self._write_q
+        if write_q is not None:
+            for record in records:
+                write_q.put(record)
+
+    def flush(self) -> None:
+        """Block until every recorded invocation has been passed to the record sink."""
+        self._materialize()
+        if self._write_q is not None:
+            self._write_q.join()
+
+    def close(self) -> None:
+        """Persist outstanding records and stop the record-sink writer thread.
+
+        Records made after `close()` stay on the track but are not persisted.
+        """
+        self._materialize()
+        write_q, self._write_q = self._write_q, None
+        if write_q is None:
+            return
+        write_q.put(_STOP)
+        self._writer.join()
+
+    def _flush_loop(self, batch_size: int) -> None:
+        write_q = self._write_q
+        while True:
+            batch = []
+            item = write_q.get()
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    break
+                try:
+                    item = write_q.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._record_sink(batch)
+                except Exception:
+                    # The batch is dropped; later records are still persisted
+                    logger.exception("Failed to persist %d tool invocation record(s)", len(batch))
+                finally:
+                    for _ in batch:
+                        write_q.task_done()
+            if item is _STOP:
+                write_q.task_done()
+                return
 
     def clear_track(self) -> None:
-        self._track.clear()
+        with self._lock:
+            self._pending.clear()
+            self._track.clear()
+            self._epoch = count()
 
-    def get_track(self) -> List[ToolInvocationRecord]:
-        return list(self._track)
+    def get_track(self) -> Tuple[ToolInvocationRecord, ...]:
+        """Return the recorded invocations as an immutable tuple."""
+        self._materialize()
+        return tuple(self._track)
+
+    def snapshot_track(self) -> List[ToolInvocationRecord]:
+        """Return the recorded invocations as a new list the caller may modify."""
+        return list(self.get_track())
+
+    @property
+    def track_position(self) -> int:
+        """Absolute position of the next record, counting records already dropped.
+
+        Every record appended since the last `clear_track()` is either still on
+        the track or was dropped from the front of a full bounded track, so the
+        position follows from the track length and the oldest kept epoch. On a
+        full bounded track written from several threads at once it can be off
+        by the few records that landed out of epoch order.
+        """
+        self._materialize()
+        track = self._track
+        if track.maxlen is None or len(track) < track.maxlen:
+            return len(track)
+        return track[0].epoch + len(track)
 
     # Rollback and redo operations
-    def rollback(self) -> List[ReverseInvocationResult]:
+    def rollback(
+        self,
+        parallel: bool = False,
+        max_workers: int = 8,
+        start_position: int = 0,
+        coalesce: bool = False,
+    ) -> List[ReverseInvocationResult]:
         """Invoke reverse tools for all reversible records in reverse order.
 
         Records for tools listed in CHECKPOINT_TOOL_NAMES are skipped.
         If a tool has no reverse registered (should not happen due to validation), it is skipped.
+        Only records at or after `start_position` (a `track_position` value) are
+        reversed; they are selected by epoch from a snapshot of the track, so
+        tools may keep recording concurrently.
+
+        With `parallel=True`, runs of consecutive records whose ToolSpec is marked
+        `independent` are reversed concurrently on up to `max_workers` threads;
+        all other records are still reversed one at a time, in order. Results are
+        returned in reverse track order either way.
+
+        With `coalesce=True`, older records of a tool whose ToolSpec defines
+        `identity_key` are skipped when a newer record of the same tool targets
+        the same resource; no result is returned for skipped records.
         """
+        self.flush()
         results: List[ReverseInvocationResult] = []
-        print("debug_mode: tool history:",self._track)
-        for record in reversed(self._track):
-            tool_name = record.tool_name
-            if tool_name in CHECKPOINT_TOOL_NAMES:
-                continue
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("tool history: %s", list(self._track))
+        with self._lock:
+            snapshot = list(self._track)
+        checkpoint_names = CHECKPOINT_TOOL_NAMES_SET
+        records = sorted(
+            (r for r in snapshot
+             if r.epoch >= start_position and r.tool_name not in checkpoint_names),
+            key=_by_epoch,
+            reverse=True,
+        )
+        if coalesce:
+            records = self._coalesce(records)
 
-            spec = self._tools.get(tool_name)
-            if not spec or spec.reverse is None:
-                # Non-reversible; skip
-                results.append(
-                    ReverseInvocationResult(
-                        tool_name=tool_name,
-                        reversed_successfully=False,
-                        error_message="No reverse handler registered",
-                    )
-                )
-                continue
+        # Local aliases keep attribute lookups out of the per-record loops
+        reverse_record = self._reverse_record
+        if not parallel:
+            return [reverse_record(record) for record in records]
 
-            try:
-                spec.reverse(record.args, record.result)
-                results.append(
-                    ReverseInvocationResult(
-                        tool_name=tool_name,
-                        reversed_successfully=True,
-                    )
-                )
-            except Exception as e:
-                results.append(
-                    ReverseInvocationResult(
-                        tool_name=tool_name,
-                        reversed_successfully=False,
-                        error_message=str(e),
-                    )
-                )
+        get_spec = self._tools.get
+        results_append = results.append
+        results_extend = results.extend
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            group: List[ToolInvocationRecord] = []
+            for record in records:
+                spec = get_spec(record.tool_name)
+                if spec and spec.independent:
+                    group.append(record)
+                    continue
+                results_extend(pool.map(reverse_record, group))
+                group = []
+                results_append(reverse_record(record))
+            results_extend(pool.map(reverse_record, group))
 
         return results
 
+    def _coalesce(self, records: List[ToolInvocationRecord]) -> List[ToolInvocationRecord]:
+        """Drop records (newest first) whose resource a newer record already reverses."""
+        seen = set()
+        kept = []
+        for record in records:
+            spec = self._tools.get(record.tool_name)
+            if spec and spec.identity_key:
+                key = (record.tool_name, spec.identity_key(record.args, record.result))
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(record)
+        return kept
+
+    def _reverse_record(self, record: ToolInvocationRecord) -> ReverseInvocationResult:
+        tool_name = record.tool_name
+        spec = self._tools.get(tool_name)
+        if not spec or spec.reverse is None:
+            # Non-reversible; skip
+            return ReverseInvocationResult(tool_name, False, "No reverse handler registered")
+
+        try:
+            spec.reverse(record.args, record.result)
+            return ReverseInvocationResult(tool_name, True)
+        except Exception as e:
+            return ReverseInvocationResult(tool_name, False, str(e))
+
     def redo(self) -> List[ToolInvocationRecord]:
         """Re-execute forward tools in original order using recorded arguments.
 
-        The results are appended to the track as new records. Checkpoint tools are
-        re-executed like any other tool.
+        The results are appended to the track as new records, in one step once every
+        tool has been replayed. Checkpoint tools are re-executed like any other tool.
+        New records share the args mapping of the record they replay, since recorded
+        args are never mutated.
         """
         new_records: List[ToolInvocationRecord] = []
-        for record in list(self._track):
-            spec = self._tools.get(record.tool_name)
+        # Local aliases keep attribute lookups out of the per-record loop
+        get_spec = self._tools.get
+        stored_result = self._stored_result
+        new_records_append = new_records.append
+        Record = ToolInvocationRecord
+        for record in sorted(self.get_track(), key=_by_epoch):
+            tool_name = record.tool_name
+            spec = get_spec(tool_name)
             if not spec:
                 continue
+            forward = spec.forward
             try:
-                new_result = spec.forward(record.args)
-                new_record = ToolInvocationRecord(
-                    tool_name=record.tool_name,
-                    args=dict(record.args),
-                    result=new_result,
+                new_result = forward(record.args)
+                new_record = Record(
+                    tool_name=tool_name,
+                    args=record.args,
+                    result=stored_result(tool_name, new_result),
                     success=True,
                 )
-                self._track.append(new_record)
-                new_records.append(new_record)
             except Exception as e:
-                new_record = ToolInvocationRecord(
-                    tool_name=record.tool_name,
-                    args=dict(record.args),
+                new_record = Record(
+                    tool_name=tool_name,
+                    args=record.args,
                     result=None,
                     success=False,
                     error_message=str(e),
                 )
-                self._track.append(new_record)
-                new_records.append(new_record)
+            new_records_append(new_record)
 
+        # Appended in one step once the replay is done
+        self._extend(new_records)
         return new_records
 
 
@@ -3,18 +3,37 @@
 Handles agent creation, rollback operations, and session management.
 """
 
-from typing import Optional, Dict, Any
+from __future__ import annotations
+
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from datetime import datetime
+from functools import lru_cache
 import os
-from agno.models.openai import OpenAIChat
 
-from src.agents.rollback_agent import RollbackAgent
 from src.sessions.external_session import ExternalSession
 from src.sessions.internal_session import InternalSession
 from src.database.repositories.external_session_repository import ExternalSessionRepository
 from src.database.repositories.internal_session_repository import InternalSessionRepository
 from src.database.repositories.checkpoint_repository import CheckpointRepository
 
+if TYPE_CHECKING:
+    # The agno model stack is imported on first agent creation, not at module load
+    import httpx
+    from agno.models.openai import OpenAIChat
+    from src.agents.rollback_agent import RollbackAgent
+
+
+@lru_cache(maxsize=16)
+def _sanitize_base_url(raw_url: Optional[str]) -> Optional[str]:
+    if not raw_url:
+        return None
+    url = raw_url.strip().rstrip("/")
+    if not url:
+        return None
+    if not (url.startswith("http://") or url.startswith("https://")):
+        url = "https://" + url
+    return url
+
 
 class AgentService:
     """Service for managing RollbackAgent instances.
@@ -36,7 +55,7 @@ class AgentService:
         # Default model configuration
         base_url = os.getenv("BASE_URL")
         api_key = os.getenv("OPENAI_API_KEY")
-        base_url = self._sanitize_base_url(base_url)
+        base_url = _sanitize_base_url(base_url)
         self.model_config = model_config or {
             "id": "gpt-4o-mini",
             "temperature": 0.7,
@@ -44,17 +63,55 @@ class AgentService:
             "base_url": base_url
         }
         
+        # One connection pool for every agent's model; created on first use
+        self._http_client: Optional[httpx.Client] = None
+        
         self.current_agent: Optional[RollbackAgent] = None
 
-    def _sanitize_base_url(self, raw_url: Optional[str]) -> Optional[str]:
-        if not raw_url:
-            return None
-        url = raw_url.strip().rstrip("/")
-        if not url:
-            return None
-        if not (url.startswith("http://") or url.startswith("https://")):
-            url = "https://" + url
-        return url
+    def _effective_model_config(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Resolve the model configuration with optional per-call overrides.
+        
+        Args:
+            api_key: Optional API key overriding the default.
+            base_url: Optional base URL overriding the default.
+            
+        Returns:
+            The default configuration itself when nothing is overridden,
+            otherwise a copy with the overrides applied.
+        """
+        if not api_key and not base_url:
+            return self.model_config
+        effective_model_config = dict(self.model_config)
+        if api_key:
+            effective_model_config["api_key"] = api_key
+        if base_url:
+            effective_model_config["base_url"] = _sanitize_base_url(base_url)
+        return effective_model_config
+    
+    def _create_model(self, model_config: Dict[str, Any]) -> OpenAIChat:
+        """Create a model for one agent, reusing the service's HTTP client.
+        
+        agno models keep per-run state, so agents never share a model; only
+        the connection pool behind them is shared.
+        
+        Args:
+            model_config: Keyword arguments for OpenAIChat.
+            
+        Returns:
+            A new OpenAIChat instance.
+        """
+        from agno.models.openai import OpenAIChat
+        
+        if "http_client" in model_config:
+            return OpenAIChat(**model_config)
+        if self._http_client is None:
+            from openai import DefaultHttpxClient
+            self._http_client = DefaultHttpxClient()
+        return OpenAIChat(http_client=self._http_client, **model_config)
     
     def create_new_agent(
         self,
@@ -77,16 +134,14 @@ class AgentService:
             The created RollbackAgent instance.
         """
         # Resolve effective model configuration (allow per-call overrides)
-        effective_model_config = dict(self.model_config)
-        if api_key:
-            effective_model_config["api_key"] = api_key
-        if base_url:
-            effective_model_config["base_url"] = self._sanitize_base_url(base_url)
+        effective_model_config = self._effective_model_config(api_key, base_url)
         
         # Create the model
-        model = OpenAIChat(**effective_model_config)
+        model = self._create_model(effective_model_config)
         
         # Create the agent with repositories
+        from src.agents.rollback_agent import RollbackAgent
+        
         agent = RollbackAgent(
             external_session_id=external_session_id,
             model=model,
@@ -142,12 +197,10 @@ class AgentService:
             return self.create_new_agent(external_session_id)
         
         # Create agent and restore state
-        effective_model_config = dict(self.model_config)
-        if api_key:
-            effective_model_config["api_key"] = api_key
-        if base_url:
-            effective_model_config["base_url"] = self._sanitize_base_url(base_url)
-        model = OpenAIChat(**effective_model_config)
+        from src.agents.rollback_agent import RollbackAgent
+        
+        effective_model_config = self._effective_model_config(api_key, base_url)
+        model = self._create_model(effective_model_config)
         
         agent = RollbackAgent(
             external_session_id=external_session_id,
@@ -201,12 +254,10 @@ class AgentService:
                         if not rr.reversed_successfully:
                             print(f"Warning: Failed to reverse {rr.tool_name}: {rr.error_message}")
             
-            effective_model_config = dict(self.model_config)
-            if api_key:
-                effective_model_config["api_key"] = api_key
-            if base_url:
-                effective_model_config["base_url"] = self._sanitize_base_url(base_url)
-            model = OpenAIChat(**effective_model_config)
+            effective_model_config = self._effective_model_config(api_key, base_url)
+            model = self._create_model(effective_model_config)
+            
+            from src.agents.rollback_agent import RollbackAgent
             
             agent = RollbackAgent.from_checkpoint(
                 checkpoint_id=checkpoint_id,
@@ -236,19 +287,21 @@ class AgentService:
         Returns:
             True if a rollback was requested and should be handled, False otherwise.
         """
+        state = agent.session_state
+        
         # Check if rollback was requested
-        if agent.session_state.get('rollback_requested'):
-            checkpoint_id = agent.session_state.get('rollback_checkpoint_id')
-            if checkpoint_id:
-                # Don't clear the checkpoint_id yet - the caller needs it!
-                # Only clear the request flag
-                agent.session_state['rollback_requested'] = False
-                # Keep rollback_checkpoint_id for the caller to use
-                agent._save_internal_session()
-                
-                return True  # Signal that rollback should be performed
-        
-        return False
+        if not state.get('rollback_requested'):
+            return False
+        
+        # Don't clear the checkpoint_id - the caller needs it!
+        if not state.get('rollback_checkpoint_id'):
+            return False
+        
+        # Only clear the request flag
+        state['rollback_requested'] = False
+        agent._save_internal_session()
+        
+        return True  # Signal that rollback should be performed
     
     def list_internal_sessions(self, external_session_id: int) -> list:
         """List all internal sessions for an external session.
@@ -286,16 +339,16 @@ class AgentService:
         if not history:
             return "No conversation history yet."
         
-        summary = f"Conversation ({len(history)} messages):\n"
+        parts = [f"Conversation ({len(history)} messages):"]
         for msg in history[-10:]:  # Show last 10 messages
             role = msg.get('role', 'unknown')
             content = msg.get('content', '')
-            timestamp = msg.get('timestamp', '')
             
             # Truncate long messages
             if len(content) > 100:
                 content = content[:97] + "..."
             
-            summary += f"\n[{role}] {content}\n"
+            parts.append(f"[{role}] {content}")
         
-        return summary
\ No newline at end of file
+        # Blank line between entries, as before, without the trailing newline
+        return "\n\n".join(parts)
\ No newline at end of file
@@ -3,18 +3,66 @@
 Extends Agno's Agent to add automatic checkpoint creation and database persistence.
 """
 
-from typing import Optional, Dict, Any, List, Callable, Mapping
+from typing import Optional, Dict, Any, List, Callable, Mapping, Iterator, Tuple, TYPE_CHECKING
+from contextlib import nullcontext
 from datetime import datetime
+from functools import lru_cache
+import threading
 import uuid
 
 from agno.agent import Agent
-from agno.storage.sqlite import SqliteStorage
 
 from src.sessions.internal_session import InternalSession
 from src.checkpoints.checkpoint import Checkpoint
 from src.database.repositories.external_session_repository import ExternalSessionRepository
+from src.database.db_config import apply_sqlite_pragmas
 from rollback_portocal import ToolRollbackRegistry, ToolSpec
 
+if TYPE_CHECKING:
+    # Imported on first use: agno's storage pulls in SQLAlchemy, which
+    # agno.agent itself does not need
+    from agno.storage.sqlite import SqliteStorage
+
+
+def _tune_storage(storage: "SqliteStorage") -> "SqliteStorage":
+    """Apply the shared SQLite pragmas to every connection of a storage's engine.
+    
+    SqliteStorage builds its own engine (it ignores db_engine when given a
+    file), so the pragmas are attached afterwards. Connections the storage
+    already opened are discarded so that none of them skip the pragmas.
+    """
+    from sqlalchemy import event
+    
+    engine = storage.db_engine
+    event.listen(engine, "connect", lambda dbapi_connection, _record: apply_sqlite_pragmas(dbapi_connection))
+    engine.dispose()
+    return storage
+
+
+# Sentinel for attribute lookups where None is a valid value
+_MISSING = object()
+
+
+# Serializes session and checkpoint writes across agents in this process, so
+# concurrent runs queue here instead of failing with "database is locked".
+_WRITE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_shared_storage(db_file: str) -> "SqliteStorage":
+    """Return the process-wide Agno session storage for a database file.
+    
+    All agents share one engine and one table; sessions are told apart by
+    their session_id column.
+    """
+    from agno.storage.sqlite import SqliteStorage
+    
+    return _tune_storage(SqliteStorage(
+        table_name="agno_sessions",
+        db_file=db_file,
+        auto_upgrade_schema=True
+    ))
+
 
 class RollbackAgent(Agent):
     """Agent with checkpoint and rollback capabilities.
@@ -32,6 +80,17 @@ class RollbackAgent(Agent):
         external_session_repo: Repository for external session operations.
     """
     
+    # Checkpoint management tools exposed by this agent; calling them never
+    # triggers an automatic checkpoint
+    _CHECKPOINT_TOOL_NAMES = frozenset({
+        'create_checkpoint_tool',
+        'list_checkpoints_tool',
+        'rollback_to_checkpoint_tool',
+        'delete_checkpoint_tool',
+        'get_checkpoint_info_tool',
+        'cleanup_auto_checkpoints_tool'
+    })
+    
     def __init__(
         self,
         external_session_id: int,
@@ -59,11 +118,7 @@ class RollbackAgent(Agent):
         
         # Set up storage if not provided
         if 'storage' not in kwargs:
-            kwargs['storage'] = SqliteStorage(
-                table_name=f"agno_session_{agno_session_id}",
-                db_file="data/agno_sessions.db",
-                auto_upgrade_schema=True
-            )
+            kwargs['storage'] = _get_shared_storage("data/agno_sessions.db")
         
         # Track tool usage for automatic checkpointing
         self._tool_was_called = False
@@ -138,6 +193,9 @@ class RollbackAgent(Agent):
         # Flags for restored state
         self._restored_from_checkpoint = False
         self._restored_history = []
+        
+        # Bumped whenever the conversation history changes so callers can cache views of it
+        self.history_version = 0
 
         # Register user-provided tools that have reverse handlers into rollback registry
         # We intentionally avoid registering checkpoint-management tools
@@ -217,8 +275,52 @@ class RollbackAgent(Agent):
         Returns:
             The agent's response.
         """
+        self._before_run(message, kwargs)
+        
+        # Call parent run method with potentially injected messages
+        response = super().run(message, **kwargs)
+        
+        self._after_run(response)
+        return response
+    
+    def run_stream(self, message: str, **kwargs) -> Iterator[str]:
+        """Run the agent and yield the response text as it is generated.
+        
+        Persistence and automatic checkpoints work as in run(); they happen
+        once the stream is exhausted. The complete response is then
+        available as ``self.run_response``.
+        
+        Args:
+            message: The user message to process.
+            **kwargs: Additional arguments for the run.
+            
+        Yields:
+            Chunks of the response content.
+        """
+        try:
+            from agno.run.response import RunResponseContentEvent
+        except ImportError:
+            # agno releases without agno.run.response: take any event carrying text
+            RunResponseContentEvent = object
+        
+        self._before_run(message, kwargs)
+        
+        for event in super().run(message, stream=True, **kwargs):
+            if isinstance(event, RunResponseContentEvent) and isinstance(getattr(event, "content", None), str):
+                yield event.content
+        
+        self._after_run(self.run_response)
+    
+    def _before_run(self, message: str, kwargs: Dict[str, Any]):
+        """Record the user message and prepare the run arguments.
+        
+        Args:
+            message: The user message to process.
+            kwargs: Run arguments; restored history is injected in place.
+        """
         # Store the message in conversation history
         self.internal_session.add_message("user", message)
+        self.history_version += 1
         
         # If this is the first run after restoration, inject the history
         if self._restored_from_checkpoint and self._restored_history:
@@ -239,29 +341,33 @@ class RollbackAgent(Agent):
         # Reset tool tracking before running
         self._tool_was_called = False
         self._last_tool_called = None
+    
+    def _after_run(self, response):
+        """Record the response, create automatic checkpoints and persist the session.
         
-        # Call parent run method with potentially injected messages
-        response = super().run(message, **kwargs)
-        
+        Args:
+            response: The response from the agent.
+        """
         # Extract response content
         response_content = self._extract_response_content(response)
         
         # Store the response in conversation history
         self.internal_session.add_message("assistant", response_content)
+        self.history_version += 1
         
         # Update session state from agent
         self.internal_session.update_state(self.session_state)
         
-        # Check if tool was called using our hook and create checkpoint if needed
-        # Skip auto-checkpoint if checkpoint management tools were used
-        if self.auto_checkpoint and self._tool_was_called:
-            if not self._is_checkpoint_tool(self._last_tool_called):
-                self._create_auto_checkpoint(f"After {self._last_tool_called}")
-        
-        # Save the updated internal session to database
-        self._save_internal_session()
-        
-        return response
+        # Commit the checkpoint and session writes together
+        with _WRITE_LOCK, self._persistence_transaction():
+            # Check if tool was called using our hook and create checkpoint if needed
+            # Skip auto-checkpoint if checkpoint management tools were used
+            if self.auto_checkpoint and self._tool_was_called:
+                if not self._is_checkpoint_tool(self._last_tool_called):
+                    self._create_auto_checkpoint(f"After {self._last_tool_called}")
+            
+            # Save the updated internal session to database
+            self._save_internal_session()
     
     def _extract_response_content(self, response) -> str:
         """Extract the content from the agent response.
@@ -272,8 +378,10 @@ class RollbackAgent(Agent):
         Returns:
             The extracted content as a string.
         """
-        if hasattr(response, 'content'):
-            return response.content
+        # One attribute lookup instead of hasattr() followed by a second access
+        content = getattr(response, 'content', _MISSING)
+        if content is not _MISSING:
+            return content
         elif isinstance(response, dict) and 'content' in response:
             return response['content']
         elif isinstance(response, str):
@@ -290,8 +398,9 @@ class RollbackAgent(Agent):
         Returns:
             True if tool calls were made, False otherwise.
         """
-        if hasattr(response, 'tool_calls'):
-            return bool(response.tool_calls)
+        tool_calls = getattr(response, 'tool_calls', _MISSING)
+        if tool_calls is not _MISSING:
+            return bool(tool_calls)
         elif isinstance(response, dict):
             return bool(response.get('tool_calls'))
         return False
@@ -305,19 +414,7 @@ class RollbackAgent(Agent):
         Returns:
             True if it's a checkpoint tool, False otherwise.
         """
-        if not tool_name:
-            return False
-            
-        checkpoint_tool_names = {
-            'create_checkpoint_tool',
-            'list_checkpoints_tool', 
-            'rollback_to_checkpoint_tool',
-            'delete_checkpoint_tool',
-            'get_checkpoint_info_tool',
-            'cleanup_auto_checkpoints_tool'
-        }
-        
-        return tool_name in checkpoint_tool_names
+        return tool_name in self._CHECKPOINT_TOOL_NAMES
     
     def _used_checkpoint_tools(self, response) -> bool:
         """Check if checkpoint management tools were used.
@@ -331,14 +428,7 @@ class RollbackAgent(Agent):
         Returns:
             True if checkpoint tools were used, False otherwise.
         """
-        checkpoint_tool_names = {
-            'create_checkpoint_tool',
-            'list_checkpoints_tool', 
-            'rollback_to_checkpoint_tool',
-            'delete_checkpoint_tool',
-            'get_checkpoint_info_tool',
-            'cleanup_auto_checkpoints_tool'
-        }
+        checkpoint_tool_names = self._CHECKPOINT_TOOL_NAMES
         
         if hasattr(response, 'tool_calls'):
             for tool_call in response.tool_calls:
@@ -365,8 +455,7 @@ class RollbackAgent(Agent):
                 is_auto=True
             )
             # Store current tool track position in checkpoint metadata
-            current_track = self.tool_rollback_registry.get_track()
-            checkpoint.metadata["tool_track_position"] = len(current_track)
+            checkpoint.metadata["tool_track_position"] = self.tool_rollback_registry.track_position
             
             self.checkpoint_repo.create(checkpoint)
             self.internal_session.checkpoint_count += 1
@@ -391,12 +480,13 @@ class RollbackAgent(Agent):
                 is_auto=False
             )
             # Store current tool track position in checkpoint metadata
-            current_track = self.tool_rollback_registry.get_track()
-            checkpoint.metadata["tool_track_position"] = len(current_track)
+            checkpoint.metadata["tool_track_position"] = self.tool_rollback_registry.track_position
             
-            saved_checkpoint = self.checkpoint_repo.create(checkpoint)
-            self.internal_session.checkpoint_count += 1
-            self._save_internal_session()
+            # Runs on the tool path during a run, so serialize with other agents' writes
+            with _WRITE_LOCK:
+                saved_checkpoint = self.checkpoint_repo.create(checkpoint)
+                self.internal_session.checkpoint_count += 1
+                self._save_internal_session()
             
             if saved_checkpoint:
                 return f"✓ Checkpoint '{name}' created successfully (ID: {saved_checkpoint.id})"
@@ -552,6 +642,15 @@ class RollbackAgent(Agent):
         else:
             return "No automatic checkpoints to clean up."
     
+    def _persistence_transaction(self):
+        """Return a context manager grouping this agent's database writes.
+        
+        Falls back to a no-op when there is no internal session repository.
+        """
+        if self.internal_session_repo is None:
+            return nullcontext()
+        return self.internal_session_repo.transaction()
+    
     def _save_internal_session(self):
         """Save the current internal session to the database."""
         if self.internal_session_repo and self.internal_session.id:
@@ -591,49 +690,7 @@ class RollbackAgent(Agent):
         Returns:
             List of reverse invocation results.
         """
-        from rollback_portocal.protocol import CHECKPOINT_TOOL_NAMES, ReverseInvocationResult
-        
-        track = self.tool_rollback_registry.get_track()
-        results = []
-        
-        # Rollback tools from start_index to end in reverse order
-        for i in range(len(track) - 1, start_index - 1, -1):
-            record = track[i]
-            tool_name = record.tool_name
-            
-            # Skip checkpoint tools
-            if tool_name in CHECKPOINT_TOOL_NAMES:
-                continue
-                
-            spec = self.tool_rollback_registry.get_tool(tool_name)
-            if not spec or spec.reverse is None:
-                results.append(
-                    ReverseInvocationResult(
-                        tool_name=tool_name,
-                        reversed_successfully=False,
-                        error_message="No reverse handler registered",
-                    )
-                )
-                continue
-                
-            try:
-                spec.reverse(record.args, record.result)
-                results.append(
-                    ReverseInvocationResult(
-                        tool_name=tool_name,
-                        reversed_successfully=True,
-                    )
-                )
-            except Exception as e:
-                results.append(
-                    ReverseInvocationResult(
-                        tool_name=tool_name,
-                        reversed_successfully=False,
-                        error_message=str(e),
-                    )
-                )
-        
-        return results
+        return self.tool_rollback_registry.rollback(start_position=start_index)
 
     def redo_tools(self) -> List[Any]:
         """Re-execute forward handlers for recorded tools in original order.
@@ -642,16 +699,18 @@ class RollbackAgent(Agent):
         """
         return self.tool_rollback_registry.redo()
 
-    def get_tool_track(self) -> List[Any]:
-        """Return current recorded tool invocation track."""
+    def get_tool_track(self) -> Tuple[Any, ...]:
+        """Return current recorded tool invocation track (read-only)."""
         return self.tool_rollback_registry.get_track()
 
     def get_messages_for_session(self, **kwargs):
-        """Override to inject restored conversation history when applicable.
+        """Override to include restored conversation history when applicable.
         
-        This method is called by Agno when add_history_to_messages=True.
-        When we restore from a checkpoint, we need to provide the conversation
-        history from before the rollback so the agent has context.
+        Agno's run loop does not call this method; it builds run history
+        itself. Restored history reaches the model only through the messages
+        injected by _before_run on the first run after a rollback, which also
+        clears the restore flag. Until that run, callers of this method see
+        the restored history ahead of the stored messages.
         
         Returns:
             List of messages including restored history if applicable.
@@ -663,32 +722,32 @@ class RollbackAgent(Agent):
         if self._restored_from_checkpoint and self._restored_history:
             # Convert our internal history format to Agno's message format
             # We need to match whatever format Agno expects
-            restored_messages = []
-            
-            for msg in self._restored_history:
-                # Create message in the same format as Agno's messages
-                # Check what format the existing messages have
-                if messages and hasattr(messages[0], '__class__'):
-                    # Use the same class as existing messages
-                    MessageClass = messages[0].__class__
-                    message = MessageClass(
+            # The format depends only on the existing messages, so pick it once
+            if messages:
+                # Use the same class as existing messages
+                MessageClass = messages[0].__class__
+                restored_messages = [
+                    MessageClass(
                         role=msg.get("role", "user"),
                         content=msg.get("content", ""),
                     )
-                else:
-                    # Fall back to dict format
-                    message = {
+                    for msg in self._restored_history
+                ]
+            else:
+                # Fall back to dict format
+                restored_messages = [
+                    {
                         "role": msg.get("role", "user"),
                         "content": msg.get("content", ""),
                     }
-                restored_messages.append(message)
+                    for msg in self._restored_history
+                ]
             
             # Combine restored history with any new messages
             # Put restored history first, then any new messages
             combined_messages = restored_messages + messages
             
-            # Note: We don't clear the flag here since it's already cleared in run()
-            # This method might not be called in all scenarios
+            # The flag is cleared by _before_run, the single injection point
             
             return combined_messages
         
@@ -747,6 +806,7 @@ class RollbackAgent(Agent):
         # Restore state and history from checkpoint
         agent.internal_session.session_state = checkpoint.session_state.copy()
         agent.internal_session.conversation_history = checkpoint.conversation_history.copy()
+        agent.history_version += 1
         
         # CRITICAL FIX: Store the restored history so it can be used in the run method
         # This flag tells our agent that we're in a restored state
@@ -755,28 +815,29 @@ class RollbackAgent(Agent):
         
         # CRITICAL FIX 2: Copy all checkpoints up to and including the restored checkpoint
         # to the new internal session for full snapshot rollback capability
-        if checkpoint_repo and agent.internal_session.id:
-            # Get all checkpoints from the original internal session
-            original_checkpoints = checkpoint_repo.get_by_internal_session(
+        if checkpoint_repo and agent.internal_session.id and checkpoint.created_at:
+            # Get the original session's checkpoints created before or at the same
+            # time as our target checkpoint
+            original_checkpoints = checkpoint_repo.get_by_internal_session_before(
                 checkpoint.internal_session_id,
-                auto_only=False
+                checkpoint.created_at
             )
             
-            # Copy checkpoints created before or at the rollback point
-            for cp in original_checkpoints:
-                # Only copy checkpoints created before or at the same time as our target checkpoint
-                if cp.created_at and checkpoint.created_at and cp.created_at <= checkpoint.created_at:
-                    # Create a copy of the checkpoint for the new internal session
-                    new_checkpoint = Checkpoint(
-                        internal_session_id=agent.internal_session.id,
-                        checkpoint_name=cp.checkpoint_name,
-                        session_state=cp.session_state.copy(),
-                        conversation_history=cp.conversation_history.copy(),
-                        is_auto=cp.is_auto,
-                        created_at=cp.created_at,
-                        metadata=cp.metadata.copy()
-                    )
-                    checkpoint_repo.create(new_checkpoint)
+            # Copy them to the new internal session in one transaction. The loaded
+            # checkpoints are discarded once saved, so their payloads are shared
+            # rather than copied; the repository serializes them to JSON anyway.
+            checkpoint_repo.bulk_create([
+                Checkpoint(
+                    internal_session_id=agent.internal_session.id,
+                    checkpoint_name=cp.checkpoint_name,
+                    session_state=cp.session_state,
+                    conversation_history=cp.conversation_history,
+                    is_auto=cp.is_auto,
+                    created_at=cp.created_at,
+                    metadata=cp.metadata
+                )
+                for cp in original_checkpoints
+            ])
         
         # Save the restored session
         agent._save_internal_session()
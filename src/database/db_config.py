@@ -4,8 +4,22 @@ Provides centralized database path management and ensures database file exists.
 """
 
 import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, Optional, Tuple
+
+
+# Connection settings for write-heavy SQLite use: WAL lets readers proceed
+# during writes and synchronous=NORMAL fsyncs only at WAL checkpoints
+SQLITE_PRAGMAS: Tuple[str, ...] = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+)
 
 
 class DatabaseConfig:
@@ -69,6 +83,91 @@ def get_database_path() -> str:
     return _db_config.get_path()
 
 
+def apply_sqlite_pragmas(connection) -> None:
+    """Apply SQLITE_PRAGMAS to a new DB-API SQLite connection.
+    
+    Args:
+        connection: A sqlite3 connection, e.g. from a SQLAlchemy "connect" event.
+    """
+    cursor = connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+# Open transactions per thread, keyed by database path
+_local = threading.local()
+
+
+def _active_transactions() -> Dict[str, sqlite3.Connection]:
+    active = getattr(_local, "transactions", None)
+    if active is None:
+        active = _local.transactions = {}
+    return active
+
+
+@contextmanager
+def transaction(db_path: str) -> Iterator[sqlite3.Connection]:
+    """Group writes to a database into one transaction on this thread.
+    
+    Repository writes made through connect() inside the block join the
+    transaction and are committed together when it exits, or all rolled
+    back if it raises. Nested blocks for the same path join the outer one.
+    
+    Args:
+        db_path: Path to the SQLite database file.
+        
+    Yields:
+        The connection holding the transaction.
+    """
+    active = _active_transactions()
+    key = os.path.abspath(db_path)
+    if key in active:
+        yield active[key]
+        return
+    
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    active[key] = conn
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        del active[key]
+        conn.close()
+
+
+@contextmanager
+def connect(db_path: str) -> Iterator[sqlite3.Connection]:
+    """Yield a connection for a write, committing it on exit.
+    
+    Inside a transaction() block for the same path, yields that block's
+    connection instead and leaves committing to it.
+    
+    Args:
+        db_path: Path to the SQLite database file.
+        
+    Yields:
+        A connection to the database.
+    """
+    conn = _active_transactions().get(os.path.abspath(db_path))
+    if conn is not None:
+        yield conn
+        return
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:  # Commits on success, rolls back on error
+            yield conn
+    finally:
+        conn.close()
+
+
 def set_database_path(db_path: str):
     """Set a custom database path.
     
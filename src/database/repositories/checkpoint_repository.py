@@ -9,7 +9,7 @@ from typing import Optional, List, Dict
 from datetime import datetime
 
 from src.checkpoints.checkpoint import Checkpoint
-from src.database.db_config import get_database_path
+from src.database.db_config import connect, get_database_path
 
 
 class CheckpointRepository:
@@ -64,6 +64,11 @@ class CheckpointRepository:
                 ON checkpoints(created_at DESC)
             """)
             
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_checkpoints_session_created
+                ON checkpoints(internal_session_id, created_at)
+            """)
+            
             conn.commit()
     
     def create(self, checkpoint: Checkpoint) -> Checkpoint:
@@ -75,31 +80,55 @@ class CheckpointRepository:
         Returns:
             The created checkpoint with id populated.
         """
+        with connect(self.db_path) as conn:
+            self._insert(conn.cursor(), checkpoint)
+        
+        return checkpoint
+    
+    def bulk_create(self, checkpoints: List[Checkpoint]) -> List[Checkpoint]:
+        """Create several checkpoints in a single transaction.
+        
+        Args:
+            checkpoints: Checkpoint objects to create.
+            
+        Returns:
+            The created checkpoints with ids populated.
+        """
+        if not checkpoints:
+            return checkpoints
+        
+        with connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            for checkpoint in checkpoints:
+                self._insert(cursor, checkpoint)
+        
+        return checkpoints
+    
+    def _insert(self, cursor, checkpoint: Checkpoint):
+        """Insert a checkpoint row and populate its id.
+        
+        Args:
+            cursor: Cursor of an open connection.
+            checkpoint: Checkpoint object to insert.
+        """
         if not checkpoint.created_at:
             checkpoint.created_at = datetime.now()
         
-        checkpoint_dict = checkpoint.to_dict()
-        json_data = json.dumps(checkpoint_dict)
+        json_data = json.dumps(checkpoint.to_dict())
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO checkpoints 
-                (internal_session_id, checkpoint_name, checkpoint_data, is_auto, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                checkpoint.internal_session_id,
-                checkpoint.checkpoint_name,
-                json_data,
-                1 if checkpoint.is_auto else 0,
-                checkpoint.created_at.isoformat()
-            ))
-            
-            checkpoint.id = cursor.lastrowid
-            conn.commit()
+        cursor.execute("""
+            INSERT INTO checkpoints 
+            (internal_session_id, checkpoint_name, checkpoint_data, is_auto, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            checkpoint.internal_session_id,
+            checkpoint.checkpoint_name,
+            json_data,
+            1 if checkpoint.is_auto else 0,
+            checkpoint.created_at.isoformat()
+        ))
         
-        return checkpoint
+        checkpoint.id = cursor.lastrowid
     
     def get_by_id(self, checkpoint_id: int) -> Optional[Checkpoint]:
         """Get a checkpoint by ID.
@@ -160,6 +189,32 @@ class CheckpointRepository:
             rows = cursor.fetchall()
             return [self._row_to_checkpoint(row) for row in rows]
     
+    def get_by_internal_session_before(self, internal_session_id: int,
+                                       cutoff: datetime) -> List[Checkpoint]:
+        """Get the checkpoints of an internal session created at or before a time.
+        
+        Args:
+            internal_session_id: The ID of the internal session.
+            cutoff: Latest creation time to include.
+            
+        Returns:
+            List of Checkpoint objects, ordered by created_at descending.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            # created_at is stored as ISO 8601 text, which sorts chronologically
+            cursor.execute("""
+                SELECT id, internal_session_id, checkpoint_name, checkpoint_data, 
+                       is_auto, created_at
+                FROM checkpoints
+                WHERE internal_session_id = ? AND created_at <= ?
+                ORDER BY created_at DESC
+            """, (internal_session_id, cutoff.isoformat()))
+            
+            rows = cursor.fetchall()
+            return [self._row_to_checkpoint(row) for row in rows]
+    
     def get_latest_checkpoint(self, internal_session_id: int) -> Optional[Checkpoint]:
         """Get the most recent checkpoint for an internal session.
         
@@ -277,6 +332,19 @@ class CheckpointRepository:
             
             return {'total': 0, 'auto': 0, 'manual': 0}
     
+    def total_count(self) -> int:
+        """Count all checkpoints across all internal sessions.
+        
+        Returns:
+            The total number of checkpoints.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM checkpoints")
+            
+            return cursor.fetchone()[0]
+    
     def _row_to_checkpoint(self, row) -> Checkpoint:
         """Convert a database row to a Checkpoint object.
         
@@ -5,7 +5,7 @@ Handles CRUD operations for external sessions in the rollback agent system.
 
 import sqlite3
 import json
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 from src.sessions.external_session import ExternalSession
@@ -353,6 +353,36 @@ class ExternalSessionRepository:
             
             return cursor.fetchone()[0]
     
+    def count_all(self) -> int:
+        """Count all external sessions across all users.
+        
+        Returns:
+            The total number of external sessions.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM external_sessions")
+            
+            return cursor.fetchone()[0]
+    
+    def count_by_user_id(self) -> Dict[int, int]:
+        """Count the sessions of every user in a single query.
+        
+        Returns:
+            Dictionary mapping user ID to its number of sessions.
+            Users without sessions are not included.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT user_id, COUNT(*) FROM external_sessions
+                GROUP BY user_id
+            """)
+            
+            return dict(cursor.fetchall())
+    
     def _row_to_session(self, row) -> ExternalSession:
         """Convert a database row to an ExternalSession object.
         
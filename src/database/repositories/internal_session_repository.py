@@ -5,11 +5,11 @@ Handles CRUD operations for internal Agno sessions in the rollback agent system.
 
 import sqlite3
 import json
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 from src.sessions.internal_session import InternalSession
-from src.database.db_config import get_database_path
+from src.database.db_config import connect, get_database_path, transaction
 
 
 class InternalSessionRepository:
@@ -35,8 +35,18 @@ class InternalSessionRepository:
             db_path: Path to SQLite database. If None, uses configured default.
         """
         self.db_path = db_path or get_database_path()
+        # Set once the checkpoints table is seen; it is never dropped afterwards
+        self._checkpoints_table_exists = False
         self._init_db()
     
+    def transaction(self):
+        """Group this repository's writes on this thread into one transaction.
+        
+        Returns:
+            A context manager; see src.database.db_config.transaction.
+        """
+        return transaction(self.db_path)
+    
     def _init_db(self):
         """Initialize the internal sessions table if it doesn't exist."""
         with sqlite3.connect(self.db_path) as conn:
@@ -66,6 +76,18 @@ class InternalSessionRepository:
                 ON internal_sessions(agno_session_id)
             """)
             
+            # One row per message, so each run only inserts its new messages
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS internal_session_messages (
+                    internal_session_id INTEGER NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT,
+                    message TEXT NOT NULL,
+                    PRIMARY KEY (internal_session_id, seq),
+                    FOREIGN KEY (internal_session_id) REFERENCES internal_sessions(id) ON DELETE CASCADE
+                )
+            """)
+            
             conn.commit()
     
     def create(self, session: InternalSession) -> InternalSession:
@@ -84,35 +106,33 @@ class InternalSessionRepository:
         if session.is_current:
             self._mark_all_not_current(session.external_session_id)
         
-        session_dict = session.to_dict()
-        
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
                 INSERT INTO internal_sessions 
                 (external_session_id, agno_session_id, state_data, conversation_history, 
                  created_at, is_current, checkpoint_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, NULL, ?, ?, ?)
             """, (
                 session.external_session_id,
                 session.agno_session_id,
                 json.dumps(session.session_state),
-                json.dumps(session.conversation_history),
                 session.created_at.isoformat(),
                 1 if session.is_current else 0,
                 session.checkpoint_count
             ))
             
             session.id = cursor.lastrowid
-            conn.commit()
+            self._save_messages(cursor, session)
         
         return session
     
     def update(self, session: InternalSession) -> bool:
         """Update an existing internal session.
         
-        Updates session state and conversation history.
+        Updates session state and inserts the conversation messages added
+        since the last save.
         
         Args:
             session: InternalSession object with updated data.
@@ -127,23 +147,24 @@ class InternalSessionRepository:
         if session.is_current:
             self._mark_all_not_current(session.external_session_id, exclude_id=session.id)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
                 UPDATE internal_sessions 
-                SET state_data = ?, conversation_history = ?, is_current = ?, checkpoint_count = ?
+                SET state_data = ?, conversation_history = NULL, is_current = ?, checkpoint_count = ?
                 WHERE id = ?
             """, (
                 json.dumps(session.session_state),
-                json.dumps(session.conversation_history),
                 1 if session.is_current else 0,
                 session.checkpoint_count,
                 session.id
             ))
             
-            conn.commit()
-            return cursor.rowcount > 0
+            if cursor.rowcount == 0:
+                return False
+            self._save_messages(cursor, session)
+            return True
     
     def get_by_id(self, session_id: int) -> Optional[InternalSession]:
         """Get an internal session by ID.
@@ -166,7 +187,7 @@ class InternalSessionRepository:
             
             row = cursor.fetchone()
             if row:
-                return self._row_to_session(row)
+                return self._rows_to_sessions(cursor, [row])[0]
         
         return None
     
@@ -191,7 +212,7 @@ class InternalSessionRepository:
             
             row = cursor.fetchone()
             if row:
-                return self._row_to_session(row)
+                return self._rows_to_sessions(cursor, [row])[0]
         
         return None
     
@@ -216,7 +237,68 @@ class InternalSessionRepository:
             """, (external_session_id,))
             
             rows = cursor.fetchall()
-            return [self._row_to_session(row) for row in rows]
+            return self._rows_to_sessions(cursor, rows)
+    
+    def get_by_external_session_with_counts(self, external_session_id: int) -> List[InternalSession]:
+        """Get all internal sessions for an external session with live checkpoint counts.
+        
+        Like get_by_external_session, but checkpoint_count is counted from the
+        checkpoints table in the same query instead of read from the stored counter.
+        
+        Args:
+            external_session_id: The ID of the external session.
+            
+        Returns:
+            List of InternalSession objects, ordered by created_at descending.
+        """
+        return self.get_by_external_session_ids([external_session_id], with_counts=True)[external_session_id]
+    
+    def get_by_external_session_ids(self, external_session_ids: List[int],
+                                    with_counts: bool = False) -> Dict[int, List[InternalSession]]:
+        """Get internal sessions for several external sessions in a single query.
+        
+        Args:
+            external_session_ids: IDs of the external sessions.
+            with_counts: If True, count checkpoints from the checkpoints table
+                instead of using the stored checkpoint_count.
+        
+        Returns:
+            Dictionary mapping each external session ID to its InternalSession
+            objects, ordered by created_at descending. IDs without internal
+            sessions map to an empty list.
+        """
+        grouped: Dict[int, List[InternalSession]] = {sid: [] for sid in external_session_ids}
+        if not external_session_ids:
+            return grouped
+        
+        placeholders = ','.join('?' * len(external_session_ids))
+        
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            if with_counts and self._has_checkpoints_table(cursor):
+                cursor.execute(f"""
+                    SELECT i.id, i.external_session_id, i.agno_session_id, i.state_data,
+                           i.conversation_history, i.created_at, i.is_current, COUNT(c.id)
+                    FROM internal_sessions i
+                    LEFT JOIN checkpoints c ON c.internal_session_id = i.id
+                    WHERE i.external_session_id IN ({placeholders})
+                    GROUP BY i.id
+                    ORDER BY i.created_at DESC
+                """, list(external_session_ids))
+            else:
+                cursor.execute(f"""
+                    SELECT id, external_session_id, agno_session_id, state_data,
+                           conversation_history, created_at, is_current, checkpoint_count
+                    FROM internal_sessions
+                    WHERE external_session_id IN ({placeholders})
+                    ORDER BY created_at DESC
+                """, list(external_session_ids))
+            
+            for session in self._rows_to_sessions(cursor, cursor.fetchall()):
+                grouped.setdefault(session.external_session_id, []).append(session)
+        
+        return grouped
     
     def get_current_session(self, external_session_id: int) -> Optional[InternalSession]:
         """Get the current internal session for an external session.
@@ -240,7 +322,7 @@ class InternalSessionRepository:
             
             row = cursor.fetchone()
             if row:
-                return self._row_to_session(row)
+                return self._rows_to_sessions(cursor, [row])[0]
         
         return None
     
@@ -285,6 +367,9 @@ class InternalSessionRepository:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
+            cursor.execute("""
+                DELETE FROM internal_session_messages WHERE internal_session_id = ?
+            """, (session_id,))
             cursor.execute("""
                 DELETE FROM internal_sessions WHERE id = ?
             """, (session_id,))
@@ -311,6 +396,19 @@ class InternalSessionRepository:
             
             return cursor.fetchone()[0]
     
+    def count_all(self) -> int:
+        """Count all internal sessions.
+        
+        Returns:
+            Total number of internal sessions.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM internal_sessions")
+            
+            return cursor.fetchone()[0]
+    
     def _mark_all_not_current(self, external_session_id: int, exclude_id: Optional[int] = None):
         """Mark all internal sessions as not current for an external session.
         
@@ -318,7 +416,7 @@ class InternalSessionRepository:
             external_session_id: The ID of the external session.
             exclude_id: Optional ID to exclude from the update.
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with connect(self.db_path) as conn:
             cursor = conn.cursor()
             
             if exclude_id:
@@ -333,27 +431,127 @@ class InternalSessionRepository:
                     SET is_current = 0
                     WHERE external_session_id = ?
                 """, (external_session_id,))
+    
+    def _has_checkpoints_table(self, cursor) -> bool:
+        """Check whether the checkpoints table has been created in this database.
+        
+        A positive answer is cached, so sqlite_master is only queried until
+        the table appears.
+        
+        Args:
+            cursor: Cursor of an open connection.
             
-            conn.commit()
+        Returns:
+            True if the checkpoints table exists.
+        """
+        if not self._checkpoints_table_exists:
+            cursor.execute("""
+                SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'checkpoints'
+            """)
+            self._checkpoints_table_exists = cursor.fetchone() is not None
+        return self._checkpoints_table_exists
+    
+    def _save_messages(self, cursor, session: InternalSession):
+        """Insert the session's messages that are not stored yet.
+        
+        Messages are appended to the history, so only those past the highest
+        stored sequence number are inserted. If the history is shorter than
+        what is stored, or its message at the last stored position differs,
+        it was replaced and is rewritten in full.
+        
+        Args:
+            cursor: Cursor of an open connection.
+            session: InternalSession with id populated.
+        """
+        cursor.execute("""
+            SELECT seq, message FROM internal_session_messages
+            WHERE internal_session_id = ?
+            ORDER BY seq DESC LIMIT 1
+        """, (session.id,))
+        last = cursor.fetchone()
+        stored = last[0] + 1 if last else 0
+        
+        history = session.conversation_history
+        if stored > len(history) or (last and json.dumps(history[last[0]]) != last[1]):
+            cursor.execute("""
+                DELETE FROM internal_session_messages WHERE internal_session_id = ?
+            """, (session.id,))
+            stored = 0
+        
+        if stored < len(history):
+            cursor.executemany("""
+                INSERT INTO internal_session_messages (internal_session_id, seq, role, message)
+                VALUES (?, ?, ?, ?)
+            """, [
+                (session.id, seq, message.get("role"), json.dumps(message))
+                for seq, message in enumerate(history[stored:], stored)
+            ])
+    
+    def _load_messages(self, cursor, session_ids: List[int]) -> Dict[int, List[Dict]]:
+        """Load stored messages for several sessions in a single query.
+        
+        Args:
+            cursor: Cursor of an open connection.
+            session_ids: IDs of the internal sessions.
+            
+        Returns:
+            Dictionary mapping session IDs to their messages in order. Sessions
+            without stored messages are absent.
+        """
+        messages: Dict[int, List[Dict]] = {}
+        if not session_ids:
+            return messages
+        
+        placeholders = ','.join('?' * len(session_ids))
+        cursor.execute(f"""
+            SELECT internal_session_id, message FROM internal_session_messages
+            WHERE internal_session_id IN ({placeholders})
+            ORDER BY internal_session_id, seq
+        """, list(session_ids))
+        
+        for session_id, message in cursor.fetchall():
+            messages.setdefault(session_id, []).append(json.loads(message))
+        return messages
+    
+    def _rows_to_sessions(self, cursor, rows) -> List[InternalSession]:
+        """Convert database rows to InternalSession objects with their messages.
+        
+        Args:
+            cursor: Cursor of an open connection.
+            rows: Tuples containing database fields.
+            
+        Returns:
+            List of InternalSession objects, in row order.
+        """
+        messages = self._load_messages(cursor, [row[0] for row in rows])
+        return [self._row_to_session(row, messages.get(row[0])) for row in rows]
     
-    def _row_to_session(self, row) -> InternalSession:
+    def _row_to_session(self, row, messages: Optional[List[Dict]] = None) -> InternalSession:
         """Convert a database row to an InternalSession object.
         
         Args:
             row: Tuple containing database fields.
+            messages: Messages loaded from the messages table, if any.
             
         Returns:
             InternalSession object.
+            
+        Note:
+            Sessions saved before messages had their own table keep their
+            history in the conversation_history column until next updated.
         """
         (session_id, external_session_id, agno_session_id, state_data, 
          conversation_history, created_at, is_current, checkpoint_count) = row
         
+        if messages is None:
+            messages = json.loads(conversation_history) if conversation_history else []
+        
         session = InternalSession(
             id=session_id,
             external_session_id=external_session_id,
             agno_session_id=agno_session_id,
             session_state=json.loads(state_data) if state_data else {},
-            conversation_history=json.loads(conversation_history) if conversation_history else [],
+            conversation_history=messages,
             created_at=datetime.fromisoformat(created_at) if created_at else None,
             is_current=bool(is_current),
             checkpoint_count=checkpoint_count or 0
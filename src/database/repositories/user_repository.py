@@ -61,6 +61,11 @@ class UserRepository:
                 )
             """)
             
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_users_is_admin
+                ON users(is_admin)
+            """)
+            
             cursor.execute("""
                 SELECT COUNT(*) FROM users WHERE username = 'rootusr'
             """)
@@ -205,6 +210,28 @@ class UserRepository:
             conn.commit()
             return cursor.rowcount > 0
     
+    def count_all(self) -> int:
+        """Count all users.
+        
+        Returns:
+            The number of users in the database.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            return cursor.fetchone()[0]
+    
+    def count_admins(self) -> int:
+        """Count users with admin privileges.
+        
+        Returns:
+            The number of admin users.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users WHERE is_admin = 1")
+            return cursor.fetchone()[0]
+    
     def _row_to_user(self, row) -> User:
         """Convert a database row to a User object.
         
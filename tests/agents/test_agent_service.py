@@ -0,0 +1,64 @@
+"""Tests for agent service.
+
+Tests that agents get their own models over a shared HTTP client.
+"""
+
+import unittest
+import os
+import tempfile
+from datetime import datetime
+
+from src.agents.agent_service import AgentService
+from src.sessions.external_session import ExternalSession
+from src.database.db_config import set_database_path
+
+
+class TestAgentService(unittest.TestCase):
+    """Test cases for AgentService functionality."""
+    
+    def setUp(self):
+        """Set up test database and service instance."""
+        self.test_db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
+        set_database_path(self.test_db_path)
+        
+        self.model_config = {"id": "gpt-4o-mini", "temperature": 0.7, "api_key": "test-key"}
+        self.agent_service = AgentService(model_config=self.model_config)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        os.close(self.test_db_fd)
+        os.unlink(self.test_db_path)
+    
+    def test_agents_get_their_own_model(self):
+        """Test that each model is a separate instance sharing one HTTP client."""
+        first = self.agent_service._create_model(dict(self.model_config))
+        second = self.agent_service._create_model(dict(self.model_config))
+        
+        self.assertIsNot(first, second)
+        self.assertIs(first.http_client, second.http_client)
+        self.assertIsNotNone(first.http_client)
+    
+    def test_agents_do_not_share_model_state(self):
+        """Test that per-run model settings of one agent do not reach another."""
+        external_session = self.agent_service.external_session_repo.create(ExternalSession(
+            user_id=1,
+            session_name="Test Session",
+            created_at=datetime.now()
+        ))
+        first = self.agent_service.create_new_agent(external_session.id)
+        second = self.agent_service.create_new_agent(external_session.id)
+        
+        first.model.temperature = 0.1
+        
+        self.assertIsNot(first.model, second.model)
+        self.assertEqual(second.model.temperature, 0.7)
+    
+    def test_request_params_are_kept(self):
+        """Test that configurations with unhashable values build a model."""
+        model = self.agent_service._create_model({**self.model_config, "request_params": {"seed": 1}})
+        
+        self.assertEqual(model.request_params, {"seed": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -233,6 +233,16 @@ class TestAuthService(unittest.TestCase):
         
         # Check rootusr
         self.assertTrue(self.auth_service.is_username_taken("rootusr"))
+    
+    def test_count_admins(self):
+        """Test counting admin users in the repository."""
+        # Only rootusr is an admin initially
+        self.assertEqual(self.user_repository.count_admins(), 1)
+        
+        # Regular users are not counted
+        self.auth_service.register("regularuser", "password123")
+        self.assertEqual(self.user_repository.count_admins(), 1)
+        self.assertEqual(self.user_repository.count_all(), 2)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+"""Tests for checkpoint repository.
+
+Tests checkpoint counting, bulk creation and cutoff lookups.
+"""
+
+import unittest
+import os
+import tempfile
+from datetime import datetime
+
+from src.checkpoints.checkpoint import Checkpoint
+from src.database.repositories.checkpoint_repository import CheckpointRepository
+from src.database.db_config import set_database_path
+
+
+class TestCheckpointRepository(unittest.TestCase):
+    """Test cases for CheckpointRepository functionality."""
+    
+    def setUp(self):
+        """Set up test database and repository instance."""
+        self.test_db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
+        set_database_path(self.test_db_path)
+        
+        self.checkpoint_repo = CheckpointRepository(self.test_db_path)
+    
+    def tearDown(self):
+        """Clean up test database."""
+        os.close(self.test_db_fd)
+        os.unlink(self.test_db_path)
+    
+    def test_total_count(self):
+        """Test counting checkpoints across internal sessions."""
+        self.assertEqual(self.checkpoint_repo.total_count(), 0)
+        
+        for internal_session_id, is_auto in [(1, False), (1, True), (2, True)]:
+            self.checkpoint_repo.create(Checkpoint(
+                internal_session_id=internal_session_id,
+                checkpoint_name="cp",
+                is_auto=is_auto
+            ))
+        
+        self.assertEqual(self.checkpoint_repo.total_count(), 3)
+    
+    def test_bulk_create(self):
+        """Test creating several checkpoints at once populates their ids."""
+        created = self.checkpoint_repo.bulk_create([
+            Checkpoint(internal_session_id=1, checkpoint_name=f"cp{i}", is_auto=bool(i % 2))
+            for i in range(3)
+        ])
+        
+        self.assertEqual(len({cp.id for cp in created}), 3)
+        self.assertEqual(self.checkpoint_repo.get_by_id(created[1].id).checkpoint_name, "cp1")
+        self.assertEqual(self.checkpoint_repo.count_checkpoints(1)["total"], 3)
+        self.assertEqual(self.checkpoint_repo.bulk_create([]), [])
+    
+    def test_get_by_internal_session_before(self):
+        """Test fetching a session's checkpoints up to a cutoff time."""
+        times = [datetime(2024, 1, 1, 10, 0, 0), datetime(2024, 1, 1, 10, 0, 0, 500000),
+                 datetime(2024, 1, 1, 11, 0, 0)]
+        for created_at in times:
+            self.checkpoint_repo.create(Checkpoint(internal_session_id=1, created_at=created_at))
+        self.checkpoint_repo.create(Checkpoint(internal_session_id=2, created_at=times[0]))
+        
+        found = self.checkpoint_repo.get_by_internal_session_before(1, times[1])
+        self.assertEqual([cp.created_at for cp in found], [times[1], times[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
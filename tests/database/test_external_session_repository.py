@@ -250,6 +250,35 @@ class TestExternalSessionRepository(unittest.TestCase):
         )
         self.assertEqual(active_count, 2)
     
+    def test_count_by_user_id(self):
+        """Test counting sessions for all users in one call."""
+        self.session_repo.create(
+            ExternalSession(user_id=self.user1.id, session_name="Session 1")
+        )
+        self.session_repo.create(
+            ExternalSession(user_id=self.user1.id, session_name="Session 2")
+        )
+        self.session_repo.create(
+            ExternalSession(user_id=self.user2.id, session_name="Session 3")
+        )
+        
+        counts = self.session_repo.count_by_user_id()
+        
+        self.assertEqual(counts, {self.user1.id: 2, self.user2.id: 1})
+    
+    def test_count_all(self):
+        """Test counting sessions across all users."""
+        self.assertEqual(self.session_repo.count_all(), 0)
+        
+        self.session_repo.create(
+            ExternalSession(user_id=self.user1.id, session_name="Session 1")
+        )
+        self.session_repo.create(
+            ExternalSession(user_id=self.user2.id, session_name="Session 2")
+        )
+        
+        self.assertEqual(self.session_repo.count_all(), 2)
+    
     def test_add_internal_session(self):
         """Test adding internal Agno sessions."""
         # Create external session
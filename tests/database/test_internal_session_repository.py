@@ -0,0 +1,209 @@
+"""Tests for internal session repository.
+
+Tests batched lookups of internal sessions across external sessions
+grouping of repository writes into one transaction, and incremental
+storage of conversation messages.
+"""
+
+import unittest
+import os
+import json
+import sqlite3
+import tempfile
+from datetime import datetime
+
+from src.sessions.external_session import ExternalSession
+from src.sessions.internal_session import InternalSession
+from src.database.repositories.external_session_repository import ExternalSessionRepository
+from src.database.repositories.internal_session_repository import InternalSessionRepository
+from src.database.repositories.user_repository import UserRepository
+from src.database.repositories.checkpoint_repository import CheckpointRepository
+from src.checkpoints.checkpoint import Checkpoint
+from src.auth.user import User
+from src.database.db_config import set_database_path
+
+
+class TestInternalSessionRepository(unittest.TestCase):
+    """Test cases for InternalSessionRepository functionality."""
+    
+    def setUp(self):
+        """Set up test database and repository instances."""
+        self.test_db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
+        set_database_path(self.test_db_path)
+        
+        self.user_repo = UserRepository(self.test_db_path)
+        self.external_repo = ExternalSessionRepository(self.test_db_path)
+        self.internal_repo = InternalSessionRepository(self.test_db_path)
+        
+        user = User(username="testuser", created_at=datetime.now())
+        user.set_password("password123")
+        self.user = self.user_repo.save(user)
+        
+        self.ext1 = self.external_repo.create(
+            ExternalSession(user_id=self.user.id, session_name="Session 1")
+        )
+        self.ext2 = self.external_repo.create(
+            ExternalSession(user_id=self.user.id, session_name="Session 2")
+        )
+    
+    def tearDown(self):
+        """Clean up test database."""
+        os.close(self.test_db_fd)
+        os.unlink(self.test_db_path)
+    
+    def test_get_by_external_session_ids(self):
+        """Test fetching internal sessions for several external sessions at once."""
+        for i in range(2):
+            self.internal_repo.create(InternalSession(
+                external_session_id=self.ext1.id,
+                agno_session_id=f"agno_ext1_{i}"
+            ))
+        
+        grouped = self.internal_repo.get_by_external_session_ids([self.ext1.id, self.ext2.id])
+        
+        self.assertEqual(set(grouped), {self.ext1.id, self.ext2.id})
+        self.assertEqual(
+            [s.agno_session_id for s in grouped[self.ext1.id]],
+            [s.agno_session_id for s in self.internal_repo.get_by_external_session(self.ext1.id)]
+        )
+        self.assertEqual(grouped[self.ext2.id], [])
+    
+    def test_get_by_external_session_ids_empty(self):
+        """Test that an empty ID list does not hit the database."""
+        self.assertEqual(self.internal_repo.get_by_external_session_ids([]), {})
+    
+    def test_count_all(self):
+        """Test counting all internal sessions."""
+        self.assertEqual(self.internal_repo.count_all(), 0)
+        
+        self.internal_repo.create(InternalSession(
+            external_session_id=self.ext1.id,
+            agno_session_id="agno_a"
+        ))
+        self.internal_repo.create(InternalSession(
+            external_session_id=self.ext2.id,
+            agno_session_id="agno_b"
+        ))
+        
+        self.assertEqual(self.internal_repo.count_all(), 2)
+    
+    def test_get_by_external_session_with_counts(self):
+        """Test that checkpoint counts are read from the checkpoints table."""
+        session = self.internal_repo.create(InternalSession(
+            external_session_id=self.ext1.id,
+            agno_session_id="agno_counted"
+        ))
+        
+        # Without a checkpoints table the stored counter is used
+        sessions = self.internal_repo.get_by_external_session_with_counts(self.ext1.id)
+        self.assertEqual(sessions[0].checkpoint_count, 0)
+        
+        checkpoint_repo = CheckpointRepository(self.test_db_path)
+        for _ in range(2):
+            checkpoint_repo.create(Checkpoint(internal_session_id=session.id))
+        
+        sessions = self.internal_repo.get_by_external_session_with_counts(self.ext1.id)
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(sessions[0].checkpoint_count, 2)
+        self.assertEqual(self.internal_repo.get_by_external_session_with_counts(self.ext2.id), [])
+
+    
+    def test_transaction_commits_writes_together(self):
+        """Test writes inside a transaction commit together or not at all."""
+        session = self.internal_repo.create(InternalSession(
+            external_session_id=self.ext1.id,
+            agno_session_id="agno_tx"
+        ))
+        checkpoint_repo = CheckpointRepository(self.test_db_path)
+        
+        with self.assertRaises(RuntimeError):
+            with self.internal_repo.transaction():
+                checkpoint_repo.create(Checkpoint(internal_session_id=session.id))
+                session.checkpoint_count = 1
+                self.internal_repo.update(session)
+                raise RuntimeError("fail before commit")
+        
+        self.assertEqual(checkpoint_repo.total_count(), 0)
+        self.assertEqual(self.internal_repo.get_by_id(session.id).checkpoint_count, 0)
+        
+        with self.internal_repo.transaction():
+            checkpoint_repo.create(Checkpoint(internal_session_id=session.id))
+            self.internal_repo.update(session)
+        
+        self.assertEqual(checkpoint_repo.total_count(), 1)
+        self.assertEqual(self.internal_repo.get_by_id(session.id).checkpoint_count, 1)
+
+    
+    def test_update_appends_new_messages(self):
+        """Test that updates store only new messages and reload the full history."""
+        session = InternalSession(external_session_id=self.ext1.id, agno_session_id="agno_msgs")
+        session.add_message("user", "hello")
+        session = self.internal_repo.create(session)
+        
+        session.add_message("assistant", "hi there")
+        session.add_message("user", "bye", source="cli")
+        self.assertTrue(self.internal_repo.update(session))
+        
+        loaded = self.internal_repo.get_by_id(session.id)
+        self.assertEqual(loaded.conversation_history, session.conversation_history)
+        self.assertEqual(loaded.conversation_history[2]["source"], "cli")
+        
+        # A replaced, shorter history is rewritten in full
+        session.conversation_history = session.conversation_history[:1]
+        self.internal_repo.update(session)
+        self.assertEqual(
+            self.internal_repo.get_by_id(session.id).conversation_history,
+            session.conversation_history
+        )
+    
+    def test_update_rewrites_replaced_history(self):
+        """Test that a history replaced with one as long or longer is rewritten."""
+        session = InternalSession(external_session_id=self.ext1.id, agno_session_id="agno_replace")
+        session.add_message("user", "hello")
+        session.add_message("assistant", "hi there")
+        session = self.internal_repo.create(session)
+        
+        # Same length, different last message (e.g. a rolled back and rewritten turn)
+        session.conversation_history[1] = {"role": "assistant", "content": "rewritten"}
+        self.internal_repo.update(session)
+        self.assertEqual(
+            self.internal_repo.get_by_id(session.id).conversation_history,
+            session.conversation_history
+        )
+        
+        # Longer replacement
+        session.conversation_history = [
+            {"role": "user", "content": "new start"},
+            {"role": "assistant", "content": "new reply"},
+            {"role": "user", "content": "more"}
+        ]
+        self.internal_repo.update(session)
+        self.assertEqual(
+            self.internal_repo.get_by_id(session.id).conversation_history,
+            session.conversation_history
+        )
+    
+    def test_legacy_history_column_is_migrated(self):
+        """Test that history stored in the old column is read and moved on update."""
+        session = self.internal_repo.create(InternalSession(
+            external_session_id=self.ext1.id,
+            agno_session_id="agno_legacy"
+        ))
+        legacy_history = [{"role": "user", "content": "old"}]
+        with sqlite3.connect(self.test_db_path) as conn:
+            conn.execute(
+                "UPDATE internal_sessions SET conversation_history = ? WHERE id = ?",
+                (json.dumps(legacy_history), session.id)
+            )
+        
+        loaded = self.internal_repo.get_by_id(session.id)
+        self.assertEqual(loaded.conversation_history, legacy_history)
+        
+        loaded.add_message("assistant", "new")
+        self.internal_repo.update(loaded)
+        history = self.internal_repo.get_by_external_session(self.ext1.id)[0].conversation_history
+        self.assertEqual([m["content"] for m in history], ["old", "new"])
+
+
+if __name__ == "__main__":
+    unittest.main()
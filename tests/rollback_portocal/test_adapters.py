@@ -0,0 +1,140 @@
+"""Tests for the Agno toolkit adapter.
+
+Tests batched tool execution and invocation recording order.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from types import MappingProxyType
+
+from rollback_portocal import AgnoToolkitAdapter
+
+
+class SlowToolkit:
+    """Toolkit whose tools sleep for the requested time."""
+    
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+    
+    def wait(self, args):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(args["delay"])
+        with self._lock:
+            self.active -= 1
+        return args["delay"]
+    
+    def fail(self, args):
+        raise RuntimeError("boom")
+    
+    async def await_wait(self, args):
+        await asyncio.sleep(args["delay"])
+        return args["delay"]
+
+
+class TestAgnoToolkitAdapter(unittest.TestCase):
+    """Test cases for AgnoToolkitAdapter functionality."""
+    
+    def setUp(self):
+        """Set up the adapter with the slow toolkit."""
+        self.toolkit = SlowToolkit()
+        self.adapter = AgnoToolkitAdapter(self.toolkit)
+        self.adapter.register_tools(
+            ["wait", "fail", "await_wait"],
+            {name: lambda args, result: None for name in ["wait", "fail", "await_wait"]}
+        )
+    
+    def tearDown(self):
+        """Shut down the adapter's thread pool."""
+        self.adapter.close()
+    
+    def test_register_missing_tool(self):
+        """Test registering a tool the toolkit lacks fails without partial registration."""
+        adapter = AgnoToolkitAdapter(self.toolkit)
+        with self.assertRaises(AttributeError):
+            adapter.register_tools(["wait", "missing"], {"wait": lambda args, result: None})
+        
+        self.assertIsNone(adapter.registry.get_tool("wait"))
+        adapter.close()
+    
+    def test_execute_and_record(self):
+        """Test single calls return the result and are recorded."""
+        self.assertEqual(self.adapter.execute_and_record("wait", {"delay": 0}), 0)
+        
+        track = self.adapter.registry.get_track()
+        self.assertEqual(len(track), 1)
+        self.assertTrue(track[0].success)
+    
+    def test_execute_and_record_converts_mappings(self):
+        """Test non-dict mappings are passed to tools as plain dicts."""
+        received = []
+        self.toolkit.capture = lambda args: received.append(args)
+        self.adapter.register_tools(["capture"], {"capture": lambda args, result: None})
+        
+        self.adapter.execute_and_record("capture", MappingProxyType({"delay": 0}))
+        
+        self.assertIs(type(received[0]), dict)
+        self.assertEqual(received[0], {"delay": 0})
+    
+    def test_execute_and_record_many_runs_concurrently(self):
+        """Test batched calls overlap and are recorded in submission order."""
+        delays = [0.05, 0.01, 0.03]
+        results = self.adapter.execute_and_record_many(
+            [("wait", {"delay": delay}) for delay in delays]
+        )
+        
+        self.assertEqual(results, delays)
+        self.assertGreater(self.toolkit.max_active, 1)
+        track = self.adapter.registry.get_track()
+        self.assertEqual([record.args["delay"] for record in track], delays)
+    
+    def test_execute_and_record_many_failure(self):
+        """Test a failing call is recorded and its error re-raised."""
+        with self.assertRaises(RuntimeError):
+            self.adapter.execute_and_record_many([
+                ("wait", {"delay": 0}),
+                ("fail", {}),
+            ])
+        
+        track = self.adapter.registry.get_track()
+        self.assertEqual([record.success for record in track], [True, False])
+        self.assertEqual(track[1].error_message, "boom")
+    
+    def test_unregistered_tool(self):
+        """Test unregistered tools are rejected before anything runs."""
+        with self.assertRaises(ValueError):
+            self.adapter.execute_and_record_many([("missing", {})])
+        
+        self.assertEqual(self.adapter.registry.get_track(), ())
+
+    
+    def test_aexecute_and_record_many(self):
+        """Test async batches mix coroutine and sync tools in order."""
+        calls = [
+            ("await_wait", {"delay": 0.03}),
+            ("wait", {"delay": 0.01}),
+            ("await_wait", {"delay": 0.0}),
+        ]
+        results = asyncio.run(self.adapter.aexecute_and_record_many(calls))
+        
+        self.assertEqual(results, [0.03, 0.01, 0.0])
+        track = self.adapter.registry.get_track()
+        self.assertEqual([record.tool_name for record in track], [name for name, _ in calls])
+    
+    def test_aexecute_and_record_failure(self):
+        """Test async calls record failures and re-raise the error."""
+        with self.assertRaises(RuntimeError):
+            asyncio.run(self.adapter.aexecute_and_record("fail", {}))
+        
+        track = self.adapter.registry.get_track()
+        self.assertEqual(len(track), 1)
+        self.assertFalse(track[0].success)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,271 @@
+"""Tests for the tool rollback registry.
+
+Tests invocation recording, rollback and redo.
+"""
+
+import threading
+import time
+import unittest
+from dataclasses import asdict
+from datetime import timezone
+
+from rollback_portocal import SchemaArgs, ToolRollbackRegistry, ToolSpec
+
+
+class TestToolRollbackRegistry(unittest.TestCase):
+    """Test cases for ToolRollbackRegistry functionality."""
+    
+    def setUp(self):
+        """Set up a registry with a reversible list-append tool."""
+        self.items = []
+        self.registry = ToolRollbackRegistry()
+        self.registry.register_tool(ToolSpec(
+            name="append",
+            forward=lambda args: self.items.append(args["value"]),
+            reverse=lambda args, result: self.items.remove(args["value"])
+        ))
+    
+    def test_checkpoint_specs_need_no_reverse(self):
+        """Test checkpoint tools register without a reverse and others do not."""
+        spec = ToolSpec(name="create_checkpoint_tool", forward=lambda args: None)
+        self.assertTrue(spec.is_checkpoint)
+        self.registry.register_tool(spec)
+        
+        with self.assertRaises(ValueError):
+            self.registry.register_tool(ToolSpec(name="write", forward=lambda args: None))
+    
+    def test_record_sink_receives_records_in_order(self):
+        """Test records are handed to the sink in order and flush() waits for them."""
+        persisted = []
+        registry = ToolRollbackRegistry(record_sink=persisted.extend, sink_batch_size=2)
+        for value in range(5):
+            registry.record_invocation("append", {"value": value}, None, success=True)
+        
+        registry.flush()
+        self.assertEqual([r.args["value"] for r in persisted], list(range(5)))
+    
+    def test_record_sink_failure_drops_batch(self):
+        """Test a failing sink batch is logged and dropped without stopping the writer."""
+        persisted = []
+        
+        def sink(batch):
+            if batch[0].args["value"] == 0:
+                raise RuntimeError("disk full")
+            persisted.extend(batch)
+        
+        registry = ToolRollbackRegistry(record_sink=sink, sink_batch_size=1)
+        with self.assertLogs("rollback_portocal.registry", level="ERROR"):
+            registry.record_invocation("append", {"value": 0}, None, success=True)
+            registry.flush()
+        registry.record_invocation("append", {"value": 1}, None, success=True)
+        registry.flush()
+        
+        self.assertEqual([r.args["value"] for r in persisted], [1])
+    
+    def test_close_persists_pending_records_and_stops_writer(self):
+        """Test close() drains fast records and joins the writer thread."""
+        persisted = []
+        registry = ToolRollbackRegistry(record_sink=persisted.extend)
+        registry.record_invocation_fast("append", {"value": 1}, None, True)
+        
+        registry.close()
+        self.assertFalse(registry._writer.is_alive())
+        self.assertEqual([r.args["value"] for r in persisted], [1])
+        
+        registry.close()
+        registry.record_invocation("append", {"value": 2}, None, success=True)
+        self.assertEqual(len(registry.get_track()), 2)
+        self.assertEqual(len(persisted), 1)
+    
+    def test_record_invocation_fast(self):
+        """Test fast records materialize in order with the other records."""
+        self.registry.record_invocation_fast("append", {"value": 1}, None, True)
+        self.registry.record_invocation("append", {"value": 2}, None, success=True)
+        self.registry.record_invocation_fast("append", {"value": 3}, None, False, "failed")
+        
+        track = self.registry.get_track()
+        self.assertEqual([r.args["value"] for r in track], [1, 2, 3])
+        self.assertEqual([r.epoch for r in track], [0, 1, 2])
+        self.assertEqual(track[2].error_message, "failed")
+        self.assertEqual(track[0].timestamp.tzinfo, timezone.utc)
+    
+    def test_record_timestamps(self):
+        """Test each record gets its own UTC timestamp at creation."""
+        self.registry.record_invocation("append", {"value": 1}, None, success=True)
+        time.sleep(0.001)
+        self.registry.record_invocation("append", {"value": 2}, None, success=True)
+        
+        first, second = self.registry.get_track()
+        self.assertEqual(first.timestamp.tzinfo, timezone.utc)
+        self.assertLess(first.timestamp, second.timestamp)
+    
+    def test_result_summary_replaces_stored_result(self):
+        """Test records keep the summary, and reverse handlers receive it."""
+        reversed_with = []
+        self.registry.register_tool(ToolSpec(
+            name="write_text_file",
+            forward=lambda args: {"path": args["path"], "content": "x" * 1000},
+            reverse=lambda args, result: reversed_with.append(result),
+            result_summary=lambda r: {"path": r["path"], "size": len(r["content"])}
+        ))
+        result = {"path": "a.txt", "content": "x" * 1000}
+        self.registry.record_invocation("write_text_file", {"path": "a.txt"}, result, success=True)
+        
+        self.assertEqual(self.registry.get_track()[0].result, {"path": "a.txt", "size": 1000})
+        self.registry.rollback()
+        self.assertEqual(reversed_with, [{"path": "a.txt", "size": 1000}])
+    
+    def test_record_snapshots_args(self):
+        """Test mutating the caller's args after recording leaves the track intact."""
+        args = {"value": 1}
+        self.registry.record_invocation("append", args, None, success=True)
+        args["value"] = 2
+        
+        self.assertEqual(self.registry.get_track()[0].args, {"value": 1})
+    
+    def test_arg_schema_stores_compact_args(self):
+        """Test args matching a tool's arg_schema are stored as SchemaArgs."""
+        files = {}
+        self.registry.register_tool(ToolSpec(
+            name="write",
+            forward=lambda args: files.__setitem__(args["path"], args["text"]),
+            reverse=lambda args, result: files.pop(args["path"]),
+            arg_schema=("path", "text")
+        ))
+        self.registry.record_invocation("write", {"text": "hi", "path": "a.txt"}, None, success=True)
+        self.registry.record_invocation("write", {"path": "b.txt"}, None, success=True)
+        
+        first, second = self.registry.get_track()
+        self.assertIsInstance(first.args, SchemaArgs)
+        self.assertEqual(first.args, {"path": "a.txt", "text": "hi"})
+        self.assertEqual(first.args_as_dict(), {"path": "a.txt", "text": "hi"})
+        # Calls that do not match the schema keep a plain dict
+        self.assertIs(type(second.args), dict)
+        
+        # Handlers read SchemaArgs like any other mapping
+        self.registry.redo()
+        self.assertEqual(files, {"a.txt": "hi"})
+    
+    def test_records_use_slots(self):
+        """Test records stay slot-based and still convert with asdict()."""
+        self.registry.record_invocation("append", {"value": 1}, None, success=True)
+        record = self.registry.get_track()[0]
+        
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertEqual(asdict(record)["args"], {"value": 1})
+
+    
+    def test_rollback_reverses_in_reverse_order(self):
+        """Test rollback undoes recorded calls from newest to oldest."""
+        for value in [1, 2, 3]:
+            self.registry.record_invocation("append", {"value": value}, None, success=True)
+        self.items.extend([1, 2, 3])
+        self.registry.record_invocation("checkpoint", {}, None, success=True)
+        
+        results = self.registry.rollback()
+        
+        self.assertEqual(self.items, [])
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r.reversed_successfully for r in results))
+    
+    def test_parallel_rollback_of_independent_tools(self):
+        """Test independent reverse tools overlap when rollback is parallel."""
+        barrier = threading.Barrier(3, timeout=2)
+        self.registry.register_tool(ToolSpec(
+            name="touch",
+            forward=lambda args: None,
+            reverse=lambda args, result: barrier.wait(),
+            independent=True
+        ))
+        for path in ["a", "b", "c"]:
+            self.registry.record_invocation("touch", {"path": path}, None, success=True)
+        self.registry.record_invocation("append", {"value": 1}, None, success=True)
+        self.items.append(1)
+        
+        results = self.registry.rollback(parallel=True)
+        
+        # The barrier only releases if all three reverses run at once
+        self.assertEqual([r.tool_name for r in results], ["append", "touch", "touch", "touch"])
+        self.assertTrue(all(r.reversed_successfully for r in results))
+        self.assertEqual(self.items, [])
+
+    
+    def test_coalescing_rollback(self):
+        """Test coalescing reverses only the newest call per resource."""
+        deleted = []
+        self.registry.register_tool(ToolSpec(
+            name="create_file",
+            forward=lambda args: None,
+            reverse=lambda args, result: deleted.append(args["path"]),
+            identity_key=lambda args, result: args["path"]
+        ))
+        for path in ["a.txt", "b.txt", "a.txt"]:
+            self.registry.record_invocation("create_file", {"path": path}, None, success=True)
+        
+        self.registry.rollback(coalesce=True)
+        self.assertEqual(deleted, ["a.txt", "b.txt"])
+        
+        deleted.clear()
+        self.registry.rollback()
+        self.assertEqual(deleted, ["a.txt", "b.txt", "a.txt"])
+    
+    def test_concurrent_recording_assigns_unique_epochs(self):
+        """Test records appended from many threads get distinct, ordered epochs."""
+        def record_many():
+            for value in range(200):
+                self.registry.record_invocation("append", {"value": value}, None, success=True)
+        
+        threads = [threading.Thread(target=record_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        epochs = [record.epoch for record in self.registry.get_track()]
+        self.assertEqual(sorted(epochs), list(range(800)))
+        self.assertEqual(self.registry.track_position, 800)
+    
+    def test_redo_replays_in_epoch_order(self):
+        """Test redo follows record epochs even if the track is out of order."""
+        for value in [1, 2, 3]:
+            self.registry.record_invocation("append", {"value": value}, None, success=True)
+        # Simulate two concurrent appends landing in the opposite order
+        self.registry._track[0], self.registry._track[1] = self.registry._track[1], self.registry._track[0]
+        
+        self.registry.redo()
+        
+        self.assertEqual(self.items, [1, 2, 3])
+        track = self.registry.get_track()
+        self.assertIs(track[3].args, track[1].args)
+    
+    def test_bounded_track_keeps_absolute_positions(self):
+        """Test a bounded track drops old records but keeps positions stable."""
+        registry = ToolRollbackRegistry(max_track_len=2)
+        registry.register_tool(ToolSpec(
+            name="append",
+            forward=lambda args: self.items.append(args["value"]),
+            reverse=lambda args, result: self.items.remove(args["value"])
+        ))
+        for value in [1, 2, 3]:
+            registry.record_invocation("append", {"value": value}, None, success=True)
+            self.items.append(value)
+        
+        self.assertEqual([r.args["value"] for r in registry.get_track()], [2, 3])
+        self.assertEqual(registry.track_position, 3)
+        
+        # Position 2 still refers to the third call after the first was dropped
+        results = registry.rollback(start_position=2)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(self.items, [1, 2])
+        
+        # Clearing restarts positions from zero
+        registry.clear_track()
+        self.assertEqual(registry.track_position, 0)
+        for value in [4, 5, 6]:
+            registry.record_invocation("append", {"value": value}, None, success=True)
+        self.assertEqual([r.epoch for r in registry.get_track()], [1, 2])
+        self.assertEqual(registry.track_position, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
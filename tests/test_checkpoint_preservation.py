@@ -8,11 +8,6 @@ not just ones created after the rollback.
 """
 
 import os
-import sys
-from pathlib import Path
-
-# Add parent directory to path to import src modules
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.database.db_config import get_database_path
 from src.auth.auth_service import AuthService
@@ -20,6 +15,10 @@ from src.sessions.external_session import ExternalSession
 from src.database.repositories.external_session_repository import ExternalSessionRepository
 from src.agents.agent_service import AgentService
 
+def _text(response):
+    """Return the text content of an agent response."""
+    return getattr(response, 'content', response)
+
 def test_checkpoint_preservation():
     """Test that checkpoints are preserved after rollback."""
     
@@ -60,29 +59,29 @@ def test_checkpoint_preservation():
     print("\n=== Creating Checkpoint A ===")
     print("User: Create checkpoint A")
     response = agent.run("Create checkpoint A")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # Add some conversation
     print("\nUser: Let's talk about dogs")
     response = agent.run("Let's talk about dogs")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # Create checkpoint B
     print("\n=== Creating Checkpoint B ===")
     print("User: Create checkpoint B")
     response = agent.run("Create checkpoint B")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # Add more conversation
     print("\nUser: Now let's discuss cats")
     response = agent.run("Now let's discuss cats")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # Create checkpoint C
     print("\n=== Creating Checkpoint C ===")
     print("User: Create checkpoint C")
     response = agent.run("Create checkpoint C")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # List all checkpoints before rollback
     print("\n=== Listing checkpoints BEFORE rollback ===")
@@ -126,7 +125,7 @@ def test_checkpoint_preservation():
     print("\n=== Listing checkpoints AFTER rollback (using tool) ===")
     print("User: List checkpoints")
     response = new_agent.run("List checkpoints")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
     # Also check directly via repository
     print("\n=== Checking checkpoints via repository ===")
@@ -166,9 +165,9 @@ def test_checkpoint_preservation():
     print("\n=== Testing nested rollback ===")
     print("User: Can you rollback to checkpoint A?")
     response = new_agent.run("Rollback to checkpoint A")
-    print(f"Assistant: {response.content if hasattr(response, 'content') else response}")
+    print(f"Assistant: {_text(response)}")
     
-    response_text = str(response.content if hasattr(response, 'content') else response).lower()
+    response_text = str(_text(response)).lower()
     if "not found" in response_text or "no checkpoint" in response_text:
         print("\n❌ FAILURE: Cannot rollback to checkpoint A from rolled-back state")
         print("   This confirms checkpoints are lost after rollback.")
@@ -7,11 +7,6 @@ has access to the conversation history from before the checkpoint.
 """
 
 import os
-import sys
-from pathlib import Path
-
-# Add parent directory to path to import src modules
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.database.db_config import get_database_path
 from src.auth.auth_service import AuthService